@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from shared_state import connect, is_shared, state_path
+
+# --- Cache backends ---
+#
+# Small key/value caches for JSON-serializable dictionaries. Entries are
+# evicted least-recently-used once `max_entries` is exceeded, and expire
+# `ttl_seconds` after they were written (a ttl of 0 disables expiry).
+#
+# Code running on the event loop uses the *_async methods: a SQLite cache may
+# wait up to SQLITE_BUSY_TIMEOUT_MS for another process's write lock, so its
+# calls run in a worker thread instead of blocking every other request.
+
+
+class CacheBackend:
+    """Interface shared by every cache backend."""
+
+    # Whether calls may block on I/O, and so must stay off the event loop
+    blocking = False
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    async def get_async(self, key: str) -> Optional[dict]:
+        return await self._call(self.get, key)
+
+    async def set_async(self, key: str, value: dict) -> None:
+        await self._call(self.set, key, value)
+
+    async def delete_async(self, key: str) -> None:
+        await self._call(self.delete, key)
+
+    async def _call(self, function, *args):
+        if self.blocking:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+
+class MemoryLRUCache(CacheBackend):
+    """In-process LRU cache with optional TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl_seconds and time.time() - created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache stored in a SQLite table, shared across restarts and worker processes."""
+
+    blocking = True
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 1024, ttl_seconds: float = 0):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self._conn = connect(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(value)
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            if self.ttl_seconds:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl_seconds,)
+                )
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def create_cache(name: str, max_entries: int = 1024, ttl_seconds: float = 0) -> CacheBackend:
+    """Builds the cache configured through `<NAME>_CACHE_*` environment variables.
+
+    <NAME>_CACHE_BACKEND      memory or sqlite; sqlite when SHARED_STATE_DIR is set, else memory
+    <NAME>_CACHE_PATH         SQLite file, defaults to <SHARED_STATE_DIR or .cache>/<name>.sqlite3
+    <NAME>_CACHE_MAX_ENTRIES  maximum number of entries kept
+    <NAME>_CACHE_TTL          seconds before an entry expires, 0 disables expiry
+    """
+    prefix = f"{name.upper()}_CACHE"
+    backend = os.getenv(f"{prefix}_BACKEND", "sqlite" if is_shared() else "memory").lower()
+    max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", max_entries))
+    ttl_seconds = float(os.getenv(f"{prefix}_TTL", ttl_seconds))
+
+    if backend == "sqlite":
+        path = os.getenv(f"{prefix}_PATH", state_path(f"{name.lower()}.sqlite3"))
+        return SQLiteCache(path, table=f"{name.lower()}_cache", max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "memory":
+        return MemoryLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown cache backend for {prefix}_BACKEND: {backend}")
@@ -1,20 +1,28 @@
+import hmac
+import io
 import json
 import os
-import tempfile
+import zipfile
+import zlib
 from http import HTTPStatus
 from typing import List, Optional
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
-from starlette.responses import Response
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
 import asyncio
-from resume_scorer import score_resume
+from resume_scorer import analyze_job, deadline_in, invalidate_results, llm_scheduler, result_cache, score_resume
+import metrics
+from metrics import render_metrics
+from model_backends import describe_backends, http_pool_stats
+from job_queue import FAILED, SUCCEEDED, JobQueue, create_job_store
 
 
 
 router = APIRouter()
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 class EventSchema(BaseModel):
@@ -37,6 +45,170 @@ class ResumeScoringResponse(BaseModel):
     data: Optional[dict] = None
     error: Optional[str] = None
     message: str
+    timings: Optional[dict] = None
+
+
+ALLOWED_EXTENSIONS = ['.pdf', '.txt']
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_ZIP_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_BATCH_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+# Uncompressed bytes of all resumes of a batch, uploaded or unpacked from zips
+MAX_BATCH_BYTES = int(os.getenv("BATCH_MAX_MB", "200")) * 1024 * 1024
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+# Seconds a single-resume request may take unless it asks otherwise; just
+# under the usual 120s client and proxy timeouts. 0 disables the deadline.
+SCORE_DEADLINE_SECONDS = float(os.getenv("SCORE_DEADLINE_SECONDS", "110"))
+# Seconds between checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 1.0
+# Status logged for requests the client abandoned (nginx's "client closed request")
+CLIENT_CLOSED_REQUEST = 499
+# Bearer token the result cache invalidation endpoints require; unset leaves
+# them open, like the other endpoints
+CACHE_ADMIN_TOKEN = os.getenv("CACHE_ADMIN_TOKEN", "")
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its request was answered."""
+
+
+async def cancel_on_disconnect(request: Request, coro):
+    """Awaits `coro`, cancelling it (and every stage and model call under it) if the client disconnects."""
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("[endpoint] client disconnected, cancelling the request")
+                metrics.requests_abandoned.inc(reason="disconnect")
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def require_cache_admin(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> None:
+    if CACHE_ADMIN_TOKEN and (
+        credentials is None or not hmac.compare_digest(credentials.credentials, CACHE_ADMIN_TOKEN)
+    ):
+        raise HTTPException(status_code=401, detail="Invalid or missing cache admin token")
+
+
+def cache_headers(cache: dict) -> dict:
+    """X-Cache (HIT or MISS), X-Cache-Key and, for a hit, Age headers for a scoring result."""
+    headers = {"X-Cache": "HIT" if cache["hit"] else "MISS", "X-Cache-Key": cache["key"]}
+    if cache["hit"]:
+        headers["Age"] = str(int(cache["age"]))
+    return headers
+
+
+def validate_resume_upload(filename: Optional[str], content: bytes) -> str:
+    """Validates a resume upload and returns its lowercase file extension."""
+    if not filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+    if len(content) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large. Maximum size: 10MB")
+
+    return file_extension
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def check_batch_limits(files: int, total_bytes: int) -> None:
+    """Rejects a batch once it holds too many resumes or too many bytes."""
+    if files > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many resumes. Maximum per batch: {MAX_BATCH_FILES}")
+    if total_bytes > MAX_BATCH_BYTES:
+        raise HTTPException(
+            status_code=400, detail=f"Batch too large. Maximum uncompressed size: {MAX_BATCH_BYTES // (1024 * 1024)}MB"
+        )
+
+
+def expand_zip_upload(filename: str, content: bytes, files: int = 0, total_bytes: int = 0) -> List[tuple]:
+    """Returns (filename, content) pairs for the resumes inside a zip archive.
+
+    `files` and `total_bytes` are what the batch already holds. The archive's
+    entries are counted and their declared sizes summed against the batch
+    limits before anything is decompressed; a member whose data does not
+    match its header cannot inflate past its declared size.
+    """
+    if len(content) > MAX_ZIP_SIZE:
+        raise HTTPException(status_code=400, detail=f"Archive too large: {filename}. Maximum size: 100MB")
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"Invalid zip archive: {filename}")
+
+    with archive:
+        members = []
+        for info in archive.infolist():
+            member_name = os.path.basename(info.filename)
+            if info.is_dir() or not member_name or info.filename.startswith("__MACOSX/"):
+                continue
+            if os.path.splitext(member_name)[1].lower() not in ALLOWED_EXTENSIONS:
+                continue
+            files += 1
+            # Oversized members are reported, not read
+            if info.file_size <= MAX_FILE_SIZE:
+                total_bytes += info.file_size
+            check_batch_limits(files, total_bytes)
+            members.append((member_name, info))
+
+        entries = []
+        for member_name, info in members:
+            if info.file_size > MAX_FILE_SIZE:
+                entries.append((member_name, None))
+                continue
+            try:
+                entries.append((member_name, archive.read(info)))
+            except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError):
+                # Corrupt data, a size or CRC that does not match the header,
+                # an unsupported compression method or encryption
+                raise HTTPException(status_code=400, detail=f"Invalid zip archive: {filename} ({info.filename} is unreadable)")
+    return entries
+
+
+async def run_scoring_job(payload: dict, resume: bytes) -> dict:
+    """Job queue handler: scores a queued resume."""
+    return await score_resume(resume, payload["job_description"], payload["target_skills"])
+
+
+job_queue = JobQueue(
+    create_job_store(),
+    run_scoring_job,
+    workers=int(os.getenv("JOB_QUEUE_WORKERS", "2")),
+    retention_seconds=float(os.getenv("JOB_QUEUE_RETENTION", str(24 * 3600))),
+    lease_seconds=float(os.getenv("JOB_QUEUE_LEASE", "60")),
+    maintenance_interval=float(os.getenv("JOB_QUEUE_MAINTENANCE_INTERVAL", "30")),
+)
+
+
+def job_status(job: dict) -> dict:
+    """Public view of a job record, without its inputs or result."""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "filename": job["payload"].get("filename"),
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result_url": f"/events/jobs/{job['job_id']}/result",
+    }
 
 
 """
@@ -63,9 +235,14 @@ def handle_event(
 
 @router.post("/score-resume", response_model=ResumeScoringResponse)
 async def score_resume_endpoint(
+    request: Request,
+    response: Response,
     resume: UploadFile = File(..., description="Resume file (PDF or text)"),
     job_description: str = Form(..., description="Job description text"),
-    target_skills: List[str] = Form(None, description="Array list of target skills")
+    target_skills: List[str] = Form(None, description="Array list of target skills"),
+    include_timings: bool = Form(False, description="Include the per-stage timing and token breakdown"),
+    deadline_seconds: Optional[float] = Form(None, description="Seconds the scoring may take (default SCORE_DEADLINE_SECONDS)"),
+    refresh: bool = Form(False, description="Re-score even if a cached result exists"),
 ) -> ResumeScoringResponse:
     """
     Score a resume against a job description and target skills.
@@ -74,59 +251,309 @@ async def score_resume_endpoint(
         resume: PDF or text file containing the resume
         job_description: Text description of the job requirements
         target_skills: Array list of skills to check for
+        include_timings: Return the per-stage timings and model usage in `timings`
+        deadline_seconds: Give up (and stop spending tokens) after this many seconds
+        refresh: Ignore a cached result for these inputs and replace it
     
     Returns:
-        Detailed scoring results including skills match, experience score, education score, and overall assessment
+        Detailed scoring results including skills match, experience score, education score, and overall assessment.
+        The X-Cache header is HIT when the result came from the result cache.
     """
     try:
-        # Validate file type
-        if not resume.filename:
-            raise HTTPException(status_code=400, detail="No file provided")
-        
-        allowed_extensions = ['.pdf', '.txt']
-        file_extension = os.path.splitext(resume.filename)[1].lower()
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-            )
-        
-        # Validate file size (10MB limit)
         content = await resume.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="File too large. Maximum size: 10MB")
-        
-    
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
+        validate_resume_upload(resume.filename, content)
+
+        # Score the resume straight from memory, abandoning it if the client leaves
+        deadline = deadline_in(deadline_seconds if deadline_seconds is not None else SCORE_DEADLINE_SECONDS)
+        result = await cancel_on_disconnect(
+            request, score_resume(content, job_description, target_skills, deadline=deadline, refresh=refresh)
+        )
+        timings = {"stages": result.pop("timings"), "usage": result.pop("usage")}
+        response.headers.update(cache_headers(result["cache"]))
+
+        return ResumeScoringResponse(
+            success=True,
+            data=result,
+            message="Resume scored successfully",
+            timings=timings if include_timings else None
+        )
+
+    except HTTPException:
+        raise
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except Exception as e:
+        return ResumeScoringResponse(
+            success=False,
+            error=str(e),
+            message="Failed to score resume"
+        )
+
+
+@router.post("/score-resume/stream")
+async def score_resume_stream_endpoint(
+    resume: UploadFile = File(..., description="Resume file (PDF or text)"),
+    job_description: str = Form(..., description="Job description text"),
+    target_skills: List[str] = Form(None, description="Array list of target skills"),
+    deadline_seconds: Optional[float] = Form(None, description="Seconds the scoring may take (default SCORE_DEADLINE_SECONDS)")
+) -> StreamingResponse:
+    """
+    Score a resume and stream each stage's output as Server-Sent Events.
+
+    Emits one event per completed stage (job_analysis, prescreen, extraction,
+    skills, experience, education, final, evaluation) followed by a `result`
+    event with the same payload as /events/score-resume, or an `error` event.
+    A resume rejected by the pre-screen gets no extraction event. The
+    pipeline is cancelled when the client disconnects.
+    """
+    content = await resume.read()
+    validate_resume_upload(resume.filename, content)
+
+    events: asyncio.Queue = asyncio.Queue()
+    deadline = deadline_in(deadline_seconds if deadline_seconds is not None else SCORE_DEADLINE_SECONDS)
+
+    async def on_stage(event: str, payload: dict) -> None:
+        await events.put(format_sse(event, payload))
+
+    async def run_pipeline() -> None:
         try:
-            # Score the resume
-            result = await score_resume(temp_path, job_description, target_skills)
-            
-            return ResumeScoringResponse(
-                success=True,
-                data=result,
-                message="Resume scored successfully"
+            result = await score_resume(
+                content, job_description, target_skills, on_stage=on_stage, deadline=deadline
             )
-            
+            response = ResumeScoringResponse(success=True, data=result, message="Resume scored successfully")
+            await events.put(format_sse("result", response.model_dump()))
+        except Exception as e:
+            response = ResumeScoringResponse(success=False, error=str(e), message="Failed to score resume")
+            await events.put(format_sse("error", response.model_dump()))
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-                
-    except HTTPException:
-        raise
+            await events.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                message = await events.get()
+                if message is None:
+                    break
+                yield message
+        finally:
+            # The client went away: stop spending tokens on the remaining stages
+            if not task.done():
+                metrics.requests_abandoned.inc(reason="disconnect")
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/score-resumes/batch", response_model=ResumeScoringResponse)
+async def score_resumes_batch_endpoint(
+    request: Request,
+    resumes: List[UploadFile] = File(..., description="Resume files (PDF or text) and/or zip archives of resumes"),
+    job_description: str = Form(..., description="Job description text"),
+    target_skills: List[str] = Form(None, description="Array list of target skills"),
+    max_concurrency: Optional[int] = Form(None, description="Maximum number of resumes scored at once"),
+    deadline_seconds: Optional[float] = Form(None, description="Seconds the whole batch may take (default: no deadline)")
+) -> ResumeScoringResponse:
+    """
+    Score many resumes against one job description and target skills.
+
+    The job description is analyzed once for the whole batch, then the resumes
+    are scored concurrently (bounded by max_concurrency, capped at
+    BATCH_MAX_CONCURRENCY). Resumes not scored by `deadline_seconds` are
+    reported as failed; if the client disconnects, the batch is cancelled.
+
+    Returns:
+        Per-resume results in upload order and a ranking of the successfully
+        scored resumes by overall score
+    """
+    # Collect (filename, content) pairs, expanding any zip archives
+    uploads = []
+    total_bytes = 0
+    for upload in resumes:
+        content = await upload.read()
+        if upload.filename and upload.filename.lower().endswith(".zip"):
+            entries = expand_zip_upload(upload.filename, content, len(uploads), total_bytes)
+        else:
+            entries = [(upload.filename, content)]
+            check_batch_limits(len(uploads) + 1, total_bytes + len(content))
+        uploads.extend(entries)
+        total_bytes += sum(len(entry) for _, entry in entries if entry is not None)
+
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No resume files provided")
+
+    concurrency = min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    if concurrency < 1:
+        raise HTTPException(status_code=400, detail="max_concurrency must be at least 1")
+
+    try:
+        # Shared work happens once per batch; every resume then hits the job cache
+        await analyze_job(job_description)
     except Exception as e:
         return ResumeScoringResponse(
             success=False,
             error=str(e),
+            message="Failed to analyze job description"
+        )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    deadline = deadline_in(deadline_seconds)
+
+    async def score_one(filename: Optional[str], content: Optional[bytes]) -> dict:
+        try:
+            if content is None:
+                raise HTTPException(status_code=400, detail="File too large. Maximum size: 10MB")
+            validate_resume_upload(filename, content)
+            async with semaphore:
+                result = await score_resume(content, job_description, target_skills, deadline=deadline)
+            return {"filename": filename, "success": True, "data": result}
+        except HTTPException as e:
+            return {"filename": filename, "success": False, "error": e.detail}
+        except Exception as e:
+            return {"filename": filename, "success": False, "error": str(e)}
+
+    async def score_all() -> List[dict]:
+        return await asyncio.gather(*(score_one(filename, content) for filename, content in uploads))
+
+    try:
+        results = await cancel_on_disconnect(request, score_all())
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+    scored = [result for result in results if result["success"]]
+    scored.sort(key=lambda result: result["data"]["evaluation"]["score"]["overall_score"], reverse=True)
+    ranking = [
+        {
+            "rank": rank,
+            "filename": result["filename"],
+            "overall_score": result["data"]["evaluation"]["score"]["overall_score"],
+            "summary": result["data"]["evaluation"]["score"]["summary"],
+        }
+        for rank, result in enumerate(scored, start=1)
+    ]
+
+    return ResumeScoringResponse(
+        success=True,
+        data={
+            "results": results,
+            "ranking": ranking,
+            "total": len(results),
+            "scored": len(scored),
+            "failed": len(results) - len(scored),
+        },
+        message=f"Scored {len(scored)} of {len(results)} resumes"
+    )
+
+
+@router.post("/jobs/score-resume", response_model=ResumeScoringResponse, status_code=HTTPStatus.ACCEPTED)
+async def submit_scoring_job_endpoint(
+    resume: UploadFile = File(..., description="Resume file (PDF or text)"),
+    job_description: str = Form(..., description="Job description text"),
+    target_skills: List[str] = Form(None, description="Array list of target skills")
+) -> ResumeScoringResponse:
+    """
+    Queue a resume for scoring and return immediately with a job id.
+
+    Poll GET /events/jobs/{job_id} for the status and fetch the scoring
+    results from GET /events/jobs/{job_id}/result once it has succeeded.
+    """
+    content = await resume.read()
+    validate_resume_upload(resume.filename, content)
+
+    job_id = await job_queue.submit(
+        {
+            "filename": resume.filename,
+            "job_description": job_description,
+            "target_skills": target_skills,
+        },
+        content,
+    )
+
+    return ResumeScoringResponse(
+        success=True,
+        data=job_status(await job_queue.get(job_id)),
+        message="Resume queued for scoring"
+    )
+
+
+@router.get("/jobs/stats")
+async def scoring_job_stats():
+    """Queue depth and throughput of the scoring job queue"""
+    return await job_queue.stats()
+
+
+@router.get("/jobs/{job_id}")
+async def scoring_job_status(job_id: str):
+    """Status of a queued scoring job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+
+@router.get("/jobs/{job_id}/result", response_model=ResumeScoringResponse)
+async def scoring_job_result(job_id: str, response: Response) -> ResumeScoringResponse:
+    """Scoring results of a finished job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job["status"] == SUCCEEDED:
+        return ResumeScoringResponse(
+            success=True,
+            data=job["result"],
+            message="Resume scored successfully"
+        )
+    if job["status"] == FAILED:
+        return ResumeScoringResponse(
+            success=False,
+            error=job["error"],
             message="Failed to score resume"
         )
 
+    response.status_code = HTTPStatus.ACCEPTED
+    return ResumeScoringResponse(
+        success=False,
+        data=job_status(job),
+        message=f"Job is {job['status']}"
+    )
+
+
+@router.delete("/cache/results")
+async def invalidate_cached_results(_: None = Depends(require_cache_admin)):
+    """Drops every cached scoring result, e.g. after changing scoring rules"""
+    # The caches may be SQLite files, keep their I/O off the event loop
+    invalidated = await asyncio.to_thread(invalidate_results)
+    return {"invalidated": invalidated, "entries": await asyncio.to_thread(len, result_cache)}
+
+
+@router.delete("/cache/results/{cache_key}")
+async def invalidate_cached_result(cache_key: str, _: None = Depends(require_cache_admin)):
+    """Drops one cached scoring result, by the X-Cache-Key it was returned with"""
+    if not await asyncio.to_thread(invalidate_results, cache_key):
+        raise HTTPException(status_code=404, detail="Result not cached")
+    return {"invalidated": 1, "entries": await asyncio.to_thread(len, result_cache)}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Per-stage latency, token, tool-call, retry and cost metrics in Prometheus format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """Model backends per agent, LLM scheduler queue and the shared HTTP connection pool"""
+    return {
+        "backends": describe_backends(),
+        "scheduler": await llm_scheduler.stats(),
+        "http_pool": http_pool_stats(),
+    }
+
 
 @router.get("/health")
 async def health_check():
@@ -142,6 +569,14 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "score_resume": "/events/score-resume",
+            "score_resume_stream": "/events/score-resume/stream",
+            "score_resumes_batch": "/events/score-resumes/batch",
+            "submit_job": "/events/jobs/score-resume",
+            "job_status": "/events/jobs/{job_id}",
+            "job_result": "/events/jobs/{job_id}/result",
+            "cached_results": "/events/cache/results",
+            "metrics": "/events/metrics",
+            "llm_stats": "/events/llm/stats",
             "health": "/events/health",
             "docs": "/docs"
         }
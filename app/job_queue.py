@@ -0,0 +1,450 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from shared_state import connect, is_shared, state_path
+
+# --- Scoring job queue ---
+#
+# Jobs are submitted with their inputs, picked up by a pool of background
+# workers and kept (with their result or error) until they are purged. The
+# store behind the queue is either in-process or a SQLite file, in which case
+# queued jobs survive restarts and every worker process of a multi-worker
+# deployment takes jobs from the same queue. A running job is leased: its
+# worker renews a heartbeat while it runs, and jobs whose heartbeat stops
+# (their process died) are put back in the queue by any other worker.
+#
+# A SQLite store may wait up to SQLITE_BUSY_TIMEOUT_MS for another process's
+# write lock, so the queue calls it from worker threads rather than from the
+# event loop (see `blocking`).
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+# Identifies this process as the owner of the jobs it runs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    """Interface shared by the job store backends.
+
+    Job records are plain dictionaries with the keys job_id, status,
+    created_at, started_at, finished_at, payload, result and error.
+    """
+
+    # Whether calls may block on I/O, and so must stay off the event loop
+    blocking = False
+
+    def create(self, payload: dict, resume: bytes) -> str:
+        raise NotImplementedError
+
+    def claim_next(self) -> Optional[tuple]:
+        """Marks the oldest queued job as running and returns (job, resume bytes)."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, result: dict) -> None:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, error: str) -> None:
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str) -> None:
+        """Renews the lease of a running job."""
+        raise NotImplementedError
+
+    def release(self, job_id: str) -> None:
+        """Puts a running job back in the queue, e.g. when its worker shuts down."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def requeue_running(self, stale_before: Optional[float] = None) -> int:
+        """Puts running jobs whose last heartbeat is older than `stale_before`
+        (every running job, if None) back in the queue."""
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """Deletes finished jobs that finished before the given timestamp."""
+        raise NotImplementedError
+
+    def list_jobs(self) -> List[dict]:
+        raise NotImplementedError
+
+    def stats(self, window_seconds: float = 60.0) -> dict:
+        """Queue depth per status plus throughput over the last window."""
+        now = time.time()
+        jobs = self.list_jobs()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        run_times = []
+        wait_times = []
+        finished_in_window = 0
+
+        for job in jobs:
+            counts[job["status"]] += 1
+            if job["started_at"] is not None:
+                wait_times.append(job["started_at"] - job["created_at"])
+            if job["finished_at"] is not None:
+                run_times.append(job["finished_at"] - job["started_at"])
+                if now - job["finished_at"] <= window_seconds:
+                    finished_in_window += 1
+
+        return {
+            "counts": counts,
+            "finished_last_window": finished_in_window,
+            "window_seconds": window_seconds,
+            "throughput_per_minute": round(finished_in_window * 60.0 / window_seconds, 2),
+            "avg_run_seconds": round(sum(run_times) / len(run_times), 3) if run_times else None,
+            "avg_wait_seconds": round(sum(wait_times) / len(wait_times), 3) if wait_times else None,
+        }
+
+
+class InMemoryJobStore(JobStore):
+    """Keeps jobs in process memory; they are lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._resumes: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def create(self, payload: dict, resume: bytes) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": QUEUED,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "payload": payload,
+                "result": None,
+                "error": None,
+            }
+            self._resumes[job_id] = resume
+        return job_id
+
+    def claim_next(self) -> Optional[tuple]:
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job["status"] == QUEUED]
+            if not queued:
+                return None
+            job = min(queued, key=lambda job: job["created_at"])
+            job["status"] = RUNNING
+            job["started_at"] = time.time()
+            return dict(job), self._resumes[job["job_id"]]
+
+    def complete(self, job_id: str, result: dict) -> None:
+        self._finish(job_id, SUCCEEDED, result=result)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status=status, finished_at=time.time(), result=result, error=error)
+            self._resumes.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def heartbeat(self, job_id: str) -> None:
+        pass
+
+    def release(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] == RUNNING:
+                job.update(status=QUEUED, started_at=None)
+
+    def requeue_running(self, stale_before: Optional[float] = None) -> int:
+        # Jobs only live as long as this process, none can be orphaned
+        return 0
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in FINISHED_STATUSES and job["finished_at"] < older_than
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def list_jobs(self) -> List[dict]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+class SQLiteJobStore(JobStore):
+    """Durable job store backed by a SQLite file."""
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._conn = connect(path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "payload TEXT NOT NULL, resume BLOB, result TEXT, error TEXT, "
+                "worker TEXT, heartbeat_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            # Files created before jobs were leased lack the lease columns
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("worker", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> dict:
+        return {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "payload": json.loads(row["payload"]),
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+        }
+
+    def create(self, payload: dict, resume: bytes) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, created_at, payload, resume) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, time.time(), json.dumps(payload), resume),
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[tuple]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, worker = ?, heartbeat_at = ? WHERE job_id = ?",
+                    (RUNNING, started_at, WORKER_ID, started_at, row["job_id"]),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        job = self._to_job(row)
+        job.update(status=RUNNING, started_at=started_at)
+        return job, bytes(row["resume"])
+
+    def complete(self, job_id: str, result: dict) -> None:
+        self._finish(job_id, SUCCEEDED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        # The resume bytes are only needed to run the job, drop them afterwards
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, resume = NULL "
+                "WHERE job_id = ?",
+                (status, time.time(), result, error, job_id),
+            )
+
+    def heartbeat(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE job_id = ? AND status = ?",
+                (time.time(), job_id, RUNNING),
+            )
+
+    def release(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, worker = NULL, heartbeat_at = NULL "
+                "WHERE job_id = ? AND status = ?",
+                (QUEUED, job_id, RUNNING),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def requeue_running(self, stale_before: Optional[float] = None) -> int:
+        stale_before = time.time() if stale_before is None else stale_before
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, worker = NULL, heartbeat_at = NULL "
+                "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (QUEUED, RUNNING, stale_before),
+            )
+        return cursor.rowcount
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (*FINISHED_STATUSES, older_than),
+            )
+        return cursor.rowcount
+
+    def list_jobs(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, status, created_at, started_at, finished_at, payload, "
+                "NULL AS result, error FROM jobs"
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+
+def create_job_store() -> JobStore:
+    """Builds the job store configured through JOB_QUEUE_BACKEND / JOB_QUEUE_PATH.
+
+    The backend defaults to sqlite when SHARED_STATE_DIR is set (multi-worker
+    mode) and to memory otherwise.
+    """
+    backend = os.getenv("JOB_QUEUE_BACKEND", "sqlite" if is_shared() else "memory").lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_QUEUE_PATH", state_path("jobs.sqlite3")))
+    if backend == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown job queue backend for JOB_QUEUE_BACKEND: {backend}")
+
+
+JobHandler = Callable[[dict, bytes], Awaitable[dict]]
+
+
+class JobQueue:
+    """Runs submitted jobs on a fixed pool of background asyncio workers."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: JobHandler,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        retention_seconds: float = 24 * 3600,
+        lease_seconds: float = 60.0,
+        maintenance_interval: float = 30.0,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        # A running job whose heartbeat is older than this is taken to be orphaned
+        self.lease_seconds = lease_seconds
+        # Seconds between purges of expired jobs and requeues of orphaned ones
+        self.maintenance_interval = maintenance_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._requeue_orphans()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload: dict, resume: bytes) -> str:
+        job_id = await self._store(self.store.create, payload, resume)
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._store(self.store.get, job_id)
+
+    async def stats(self) -> dict:
+        return {"workers": self.workers, **await self._store(self.store.stats)}
+
+    async def _store(self, function: Callable, *args):
+        """Calls a store method, in a worker thread if the store may block."""
+        if self.store.blocking:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def _requeue_orphans(self) -> None:
+        # Other workers may be running jobs right now; only their heartbeats
+        # tell live jobs from the ones of a process that died
+        requeued = await self._store(self.store.requeue_running, time.time() - self.lease_seconds)
+        if requeued:
+            print(f"[job_queue] requeued {requeued} interrupted job(s)")
+            self._wakeup.set()
+
+    async def _maintenance(self) -> None:
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            try:
+                await self._store(self.store.purge, time.time() - self.retention_seconds)
+                await self._requeue_orphans()
+            except Exception as e:
+                print(f"[job_queue] maintenance failed: {e}")
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self._store(self.store.heartbeat, job_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            self._wakeup.clear()
+            claimed = await self._store(self.store.claim_next)
+            if claimed is None:
+                # Wait for a submit, or poll in case another process enqueued work
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job, resume = claimed
+            heartbeat = asyncio.create_task(self._heartbeat(job["job_id"]))
+            try:
+                result = await self.handler(job["payload"], resume)
+            except asyncio.CancelledError:
+                # Shutting down: let another worker (or the next start) run it
+                await self._store(self.store.release, job["job_id"])
+                raise
+            except Exception as e:
+                print(f"[job_queue] worker {index} job {job['job_id']} failed: {e}")
+                await self._store(self.store.fail, job["job_id"], str(e))
+            else:
+                await self._store(self.store.complete, job["job_id"], result)
+            finally:
+                heartbeat.cancel()
@@ -1,7 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from router import router as process_router
+from endpoint import job_queue
+from resume_scorer import close_agents, warm_up
+from text_extraction import shutdown_pool
+
+
+async def warm_up_agents() -> None:
+    """Builds the agents in a thread so health checks are served while the SDK loads."""
+    try:
+        await asyncio.to_thread(warm_up)
+        print("[startup] agents ready")
+    except Exception as e:
+        # A request would hit the same error, and report it, when it builds the agent
+        print(f"[startup] agent warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.create_task(warm_up_agents())
+    # Background workers for the scoring job queue
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await warm_up_task
+    await close_agents()
+    shutdown_pool()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(process_router)
 
 if __name__ == "__main__":
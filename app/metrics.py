@@ -0,0 +1,258 @@
+import contextvars
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# --- Pipeline instrumentation ---
+#
+# Process-wide counters and histograms rendered in the Prometheus text
+# exposition format, plus a per-request breakdown collected through a
+# context variable so concurrent stages of one request add to the same stats.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# USD per million tokens, used to estimate spend
+INPUT_COST_PER_1M = float(os.getenv("LLM_INPUT_COST_PER_1M", "0"))
+OUTPUT_COST_PER_1M = float(os.getenv("LLM_OUTPUT_COST_PER_1M", "0"))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0.0)
+
+    def total(self) -> float:
+        """The sum over every label combination."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            # [per-bucket counts..., sum, count]
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        label_names = self.label_names + ("le",)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(label_names, key + (repr(bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(label_names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {series[-1]}")
+        return "\n".join(lines)
+
+
+stage_duration = Histogram(
+    "resume_scoring_stage_duration_seconds", "Wall-clock duration of a pipeline stage", ["stage"]
+)
+stage_errors = Counter(
+    "resume_scoring_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+pipeline_duration = Histogram(
+    "resume_scoring_pipeline_duration_seconds", "Wall-clock duration of a whole score_resume call"
+)
+requests_abandoned = Counter(
+    "resume_scoring_requests_abandoned_total", "Scoring requests stopped early, by reason (deadline, disconnect)", ["reason"]
+)
+llm_tokens = Counter(
+    "resume_scoring_llm_tokens_total", "Model tokens used, by stage and direction", ["stage", "direction"]
+)
+llm_requests = Counter(
+    "resume_scoring_llm_requests_total", "Model requests (turns) made, by stage", ["stage"]
+)
+llm_tool_calls = Counter(
+    "resume_scoring_llm_tool_calls_total", "Tool calls made by agents, by stage", ["stage"]
+)
+llm_retries = Counter(
+    "resume_scoring_llm_retries_total", "Model calls retried by the pipeline, by stage", ["stage"]
+)
+llm_cost = Counter(
+    "resume_scoring_llm_cost_usd_total", "Estimated model spend in USD, by stage", ["stage"]
+)
+llm_repairs = Counter(
+    "resume_scoring_llm_repairs_total", "Model calls re-run because their output failed validation, by stage", ["stage"]
+)
+checkpoint_hits = Counter(
+    "resume_scoring_checkpoint_hits_total", "Stages resumed from a checkpoint instead of a model call, by stage", ["stage"]
+)
+llm_queue_wait = Histogram(
+    "resume_scoring_llm_queue_wait_seconds", "Time model calls waited for the LLM scheduler, by stage", ["stage"]
+)
+
+llm_http_connections = Gauge(
+    "resume_scoring_llm_http_connections", "Connections in the shared model API pool, by state", ["state"]
+)
+llm_http_requests = Counter(
+    "resume_scoring_llm_http_requests_total", "HTTP requests sent to model APIs"
+)
+prescreen_decisions = Counter(
+    "resume_scoring_prescreen_total", "Resumes seen by the relevance pre-screen, by outcome", ["outcome"]
+)
+coalesced_calls = Counter(
+    "resume_scoring_coalesced_total", "Calls that joined an identical call already in flight, by flight", ["flight"]
+)
+result_cache_lookups = Counter(
+    "resume_scoring_result_cache_total", "Scoring requests by result cache outcome (hit, miss, refresh)", ["outcome"]
+)
+
+REGISTRY = [
+    stage_duration,
+    stage_errors,
+    pipeline_duration,
+    requests_abandoned,
+    llm_tokens,
+    llm_requests,
+    llm_tool_calls,
+    llm_retries,
+    llm_cost,
+    llm_repairs,
+    checkpoint_hits,
+    llm_queue_wait,
+    llm_http_connections,
+    llm_http_requests,
+    prescreen_decisions,
+    result_cache_lookups,
+    coalesced_calls,
+]
+
+# Called before every render to refresh gauges that are sampled, not updated
+COLLECTORS: List[Callable[[], None]] = []
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    for collect in COLLECTORS:
+        collect()
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# --- Per-request breakdown ---
+
+# Stage currently running in this task, used to label model usage
+current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_stage", default=None)
+# Per-stage usage of the request currently being scored
+request_usage: contextvars.ContextVar[Optional[Dict[str, dict]]] = contextvars.ContextVar("request_usage", default=None)
+
+
+def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+    return (input_tokens * INPUT_COST_PER_1M + output_tokens * OUTPUT_COST_PER_1M) / 1_000_000
+
+
+def record_stage(stage: str, seconds: float, failed: bool = False) -> None:
+    stage_duration.observe(seconds, stage=stage)
+    if failed:
+        stage_errors.inc(stage=stage)
+
+
+def record_llm_usage(stage: str, input_tokens: int, output_tokens: int, requests: int, tool_calls: int) -> None:
+    """Adds one agent run's usage to the process metrics and the current request's breakdown."""
+    cost = estimate_cost(input_tokens, output_tokens)
+    llm_tokens.inc(input_tokens, stage=stage, direction="input")
+    llm_tokens.inc(output_tokens, stage=stage, direction="output")
+    llm_requests.inc(requests, stage=stage)
+    llm_tool_calls.inc(tool_calls, stage=stage)
+    llm_cost.inc(cost, stage=stage)
+
+    stage_usage = _request_stage_usage(stage)
+    if stage_usage is not None:
+        stage_usage["input_tokens"] += input_tokens
+        stage_usage["output_tokens"] += output_tokens
+        stage_usage["requests"] += requests
+        stage_usage["tool_calls"] += tool_calls
+        stage_usage["cost_usd"] = round(stage_usage["cost_usd"] + cost, 6)
+
+
+def record_retry(stage: str) -> None:
+    llm_retries.inc(stage=stage)
+    stage_usage = _request_stage_usage(stage)
+    if stage_usage is not None:
+        stage_usage["retries"] += 1
+
+
+def record_repair(stage: str) -> None:
+    llm_repairs.inc(stage=stage)
+    stage_usage = _request_stage_usage(stage)
+    if stage_usage is not None:
+        stage_usage["repairs"] += 1
+
+
+def _request_stage_usage(stage: str) -> Optional[dict]:
+    usage = request_usage.get()
+    if usage is None:
+        return None
+    return usage.setdefault(stage, {
+        "input_tokens": 0, "output_tokens": 0, "requests": 0, "tool_calls": 0, "retries": 0, "repairs": 0, "cost_usd": 0.0
+    })
@@ -0,0 +1,219 @@
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+import metrics
+
+if TYPE_CHECKING:
+    import httpx
+    from agents import Model
+    from openai import AsyncOpenAI
+
+# --- Model backends ---
+#
+# Each agent has its own backend: a model name and the endpoint serving it.
+# Everything defaults to MODEL_CHOICE on the OpenAI API, and each agent can
+# be moved elsewhere through environment variables, e.g. a small fast model
+# for extraction and a stronger one for the audit:
+#
+#   MODEL_RESUME_EXTRACTOR=gpt-4o-mini
+#   MODEL_RESUME_SCORING=gpt-4o
+#
+# or every agent to an OpenAI-compatible server (such as stub_server.py):
+#
+#   LLM_BASE_URL=http://localhost:9000/v1
+#
+# Agents sharing an endpoint and key share one AsyncOpenAI client, and all of
+# those clients share one pooled HTTP client, so the calls of a request (and
+# of concurrent requests) reuse warm keep-alive connections instead of paying
+# a TCP and TLS handshake each. The openai and agents packages are only
+# imported once a model is actually built.
+
+DEFAULT_MODEL = os.getenv("MODEL_CHOICE", "gpt-4-turbo-preview")
+
+# Agent keys, used as the suffix of the per-agent variables
+AGENT_KEYS = (
+    "RESUME_EXTRACTOR",
+    "SKILL_EXTRACTOR",
+    "JOB_ANALYZER",
+    "EXPERIENCE_SCORING",
+    "EDUCATION_SCORING",
+    "RESUME_SCORING",
+)
+
+RESPONSES_API = "responses"
+CHAT_API = "chat"
+
+# Connection pool shared by every model API client
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+# Seconds an idle connection is kept open for reuse
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+# Multiplexes concurrent calls over one connection per endpoint; needs the h2 package
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes")
+# Seconds to connect, and to wait for a (non-streamed) completion
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+# Retries done by the openai client itself on connection errors, 429 and 5xx.
+# They bypass the LLM scheduler (its rate-limit pause, Retry-After handling
+# and fair queueing), which retries these errors itself, so keep this at 0.
+LLM_CLIENT_MAX_RETRIES = int(os.getenv("LLM_CLIENT_MAX_RETRIES", "0"))
+
+
+@dataclass(frozen=True)
+class ModelBackend:
+    model: str
+    base_url: Optional[str] = None  # None is the OpenAI API
+    api_key: Optional[str] = None
+    api: str = RESPONSES_API  # responses, or chat for chat-completions-only servers
+
+
+def _setting(name: str, agent_key: str, default: Optional[str] = None) -> Optional[str]:
+    """The per-agent variable NAME_<AGENT>, else the global NAME, else `default`."""
+    return os.getenv(f"{name}_{agent_key}") or os.getenv(name) or default
+
+
+def backend_for(agent_key: str) -> ModelBackend:
+    """Reads an agent's backend from MODEL_<AGENT> and LLM_BASE_URL / LLM_API_KEY / LLM_API[_<AGENT>]."""
+    agent_key = agent_key.upper()
+    base_url = _setting("LLM_BASE_URL", agent_key)
+    # Most OpenAI-compatible servers only implement chat completions
+    api = _setting("LLM_API", agent_key, CHAT_API if base_url else RESPONSES_API).lower()
+    if api not in (RESPONSES_API, CHAT_API):
+        raise ValueError(f"Unknown model API for LLM_API: {api}")
+    return ModelBackend(
+        model=os.getenv(f"MODEL_{agent_key}") or DEFAULT_MODEL,
+        base_url=base_url,
+        api_key=_setting("LLM_API_KEY", agent_key) or os.getenv("OPENAI_API_KEY"),
+        api=api,
+    )
+
+
+_http_client: Optional["httpx.AsyncClient"] = None
+_clients: Dict[Tuple[Optional[str], Optional[str]], "AsyncOpenAI"] = {}
+
+
+async def _count_request(request) -> None:
+    metrics.llm_http_requests.inc()
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """The pooled HTTP client behind every model API client."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        from openai import DefaultAsyncHttpxClient, Timeout
+
+        options = dict(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=Timeout(LLM_HTTP_TIMEOUT, connect=LLM_HTTP_CONNECT_TIMEOUT),
+            event_hooks={"request": [_count_request]},
+        )
+        try:
+            _http_client = DefaultAsyncHttpxClient(http2=LLM_HTTP2, **options)
+        except ImportError:
+            print("[model_backends] LLM_HTTP2 needs the h2 package (pip install h2), using HTTP/1.1")
+            _http_client = DefaultAsyncHttpxClient(**options)
+    return _http_client
+
+
+def get_client(base_url: Optional[str], api_key: Optional[str]) -> "AsyncOpenAI":
+    from openai import AsyncOpenAI
+
+    key = (base_url, api_key)
+    if key not in _clients:
+        # Local servers usually ignore the key, but the client insists on one
+        if api_key is None and base_url is not None:
+            api_key = "unused"
+        _clients[key] = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=get_http_client(),
+            max_retries=LLM_CLIENT_MAX_RETRIES,
+        )
+    return _clients[key]
+
+
+async def close_clients() -> None:
+    """Closes the pooled HTTP client; clients (and models) built afterwards get a new one."""
+    global _http_client
+    http_client, _http_client = _http_client, None
+    _clients.clear()
+    if http_client is not None:
+        await http_client.aclose()
+
+
+def http_pool_stats() -> dict:
+    """Connections in the shared pool, by state, plus its settings."""
+    stats = {
+        "open": _http_client is not None,
+        "connections": 0,
+        "active": 0,
+        "idle": 0,
+        "http2_connections": 0,
+        "requests_sent": int(metrics.llm_http_requests.value()),
+        "max_connections": LLM_HTTP_MAX_CONNECTIONS,
+        "max_keepalive": LLM_HTTP_MAX_KEEPALIVE,
+        "keepalive_expiry": LLM_HTTP_KEEPALIVE_EXPIRY,
+        "http2": LLM_HTTP2,
+    }
+    # httpx does not expose pool statistics, read them off the transport's
+    # connection pool (httpcore), which does
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    for connection in list(getattr(pool, "connections", [])):
+        stats["connections"] += 1
+        if connection.is_idle():
+            stats["idle"] += 1
+        else:
+            stats["active"] += 1
+        if "HTTP/2" in connection.info():
+            stats["http2_connections"] += 1
+    return stats
+
+
+def _collect_pool_metrics() -> None:
+    stats = http_pool_stats()
+    metrics.llm_http_connections.set(stats["active"], state="active")
+    metrics.llm_http_connections.set(stats["idle"], state="idle")
+
+
+metrics.COLLECTORS.append(_collect_pool_metrics)
+
+
+def build_model(backend: ModelBackend) -> "Model":
+    from agents import OpenAIChatCompletionsModel, OpenAIResponsesModel
+
+    client = get_client(backend.base_url, backend.api_key)
+    if backend.api == CHAT_API:
+        return OpenAIChatCompletionsModel(model=backend.model, openai_client=client)
+    return OpenAIResponsesModel(model=backend.model, openai_client=client)
+
+
+def agent_model(agent_key: str, with_client: bool = True) -> Union["Model", str]:
+    """The model to give an agent; just its name when no client should be created (stub backend)."""
+    backend = backend_for(agent_key)
+    return build_model(backend) if with_client else backend.model
+
+
+def model_name(model: Union["Model", str, None]) -> str:
+    """The model name behind an agent's model setting."""
+    if model is None or isinstance(model, str):
+        return model or DEFAULT_MODEL
+    return getattr(model, "model", DEFAULT_MODEL)
+
+
+def describe_backends() -> Dict[str, dict]:
+    """Model, endpoint and API per agent, without keys, for logs and the health endpoint."""
+    described = {}
+    for agent_key in AGENT_KEYS:
+        backend = backend_for(agent_key)
+        described[agent_key.lower()] = {
+            "model": backend.model,
+            "base_url": backend.base_url or "https://api.openai.com/v1",
+            "api": backend.api,
+        }
+    return described
@@ -0,0 +1,143 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from skill_matcher import SkillMatcher, match_skills, parse_skills, tokenize
+
+# --- Relevance pre-screen ---
+#
+# A cheap, local check of the resume text against the job description and the
+# target skills, run right after text extraction. Resumes that are clearly off
+# target (a football coach applying for Sales Officer) are short-circuited to a
+# low score without any of the model stages; everything else goes through the
+# full pipeline. Two signals are combined:
+#
+#   skill coverage    share of the target skills the skill matcher finds
+#                     (aliases included, so "Penjualan" counts for Sales)
+#   keyword coverage  TF-IDF weighted share of the job description's terms
+#                     that appear in the resume; the IDF is taken over the
+#                     lines of the posting, so boilerplate repeated on every
+#                     line ("pengalaman", "mampu") weighs less than "sales"
+#
+# The screen only rejects when it is confident, i.e. when the relevance is
+# close to zero; anything borderline is left to the agents. It never rejects
+# without target skills: keyword overlap alone cannot tell an English posting
+# from an Indonesian resume for the same role.
+
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() in ("1", "true", "yes")
+# Confidence (1 - relevance) at or above which a resume is short-circuited
+PRESCREEN_CONFIDENCE = float(os.getenv("PRESCREEN_CONFIDENCE", "0.9"))
+# Weight of skill coverage in the relevance; the rest is keyword coverage
+PRESCREEN_SKILL_WEIGHT = float(os.getenv("PRESCREEN_SKILL_WEIGHT", "0.6"))
+# Below this many words the text says too little to reject it on
+PRESCREEN_MIN_WORDS = int(os.getenv("PRESCREEN_MIN_WORDS", "50"))
+
+MIN_TERM_LENGTH = 3
+MAX_REPORTED_TERMS = 10
+
+# Words that carry no signal about the role, in Indonesian and English
+STOPWORDS = frozenset("""
+    ada adalah agar akan antara atau bagi bahwa baik bersedia beberapa berbagai bidang bisa
+    dalam dan dapat dari dengan di diutamakan hal harus hingga ini itu jika juga kami kamu
+    karena ke kepada lebih maksimal mampu melalui memiliki menjadi minimal mau oleh pada para
+    per posisi sangat saat sebagai secara sedang semua serta sesuai setiap siap tahun tanpa
+    telah tentang terhadap terutama untuk yaitu yang
+    about all also and any are being can for from has have into its more must not our
+    over such that the their this was were will with within you your year years
+""".split())
+
+
+@dataclass
+class ScreeningResult:
+    relevance: float
+    confidence: float  # that the resume is irrelevant
+    short_circuit: bool
+    skill_coverage: Optional[float]  # None without target skills
+    keyword_coverage: float
+    skills_found: List[str] = field(default_factory=list)
+    skills_checked: int = 0
+    matched_terms: List[str] = field(default_factory=list)
+    missing_terms: List[str] = field(default_factory=list)
+    reason: str = ""
+
+
+def terms(text: str) -> List[str]:
+    """Content words of a text: tokens without stopwords, numbers or very short words."""
+    return [
+        token for token in tokenize(text)
+        if len(token) >= MIN_TERM_LENGTH and token not in STOPWORDS and not token.isdigit()
+    ]
+
+
+def job_term_weights(job_description: str) -> Dict[str, float]:
+    """TF-IDF weight of every term in the posting, with the posting's lines as the documents."""
+    lines = [terms(line) for line in re.split(r"[\n\r]+", job_description)]
+    lines = [line for line in lines if line]
+    if not lines:
+        return {}
+    term_frequency = Counter(term for line in lines for term in line)
+    document_frequency = Counter(term for line in lines for term in set(line))
+    return {
+        term: (1 + math.log(count)) * (math.log((1 + len(lines)) / (1 + document_frequency[term])) + 1)
+        for term, count in term_frequency.items()
+    }
+
+
+def keyword_coverage(resume_terms: set, weights: Dict[str, float]) -> float:
+    total = sum(weights.values())
+    if total == 0:
+        return 0.0
+    return sum(weight for term, weight in weights.items() if term in resume_terms) / total
+
+
+def screen(
+    resume_text: str,
+    job_description: str,
+    target_skills: Optional[List[str]],
+    threshold: float = PRESCREEN_CONFIDENCE,
+) -> ScreeningResult:
+    """Scores how relevant a resume is to a posting, without any model call."""
+    resume_terms = terms(resume_text)
+    weights = job_term_weights(job_description)
+    keywords = keyword_coverage(set(resume_terms), weights)
+
+    skills = parse_skills(target_skills)
+    found: List[str] = []
+    skill_coverage = None
+    if skills:
+        matches = match_skills(resume_text, skills, SkillMatcher(resume_text))
+        found = [match.skill for match in matches if match.found]
+        skill_coverage = len(found) / len(skills)
+        relevance = PRESCREEN_SKILL_WEIGHT * skill_coverage + (1 - PRESCREEN_SKILL_WEIGHT) * keywords
+    else:
+        relevance = keywords
+
+    confidence = round(1 - min(1.0, relevance), 3)
+    ranked = sorted(weights, key=weights.get, reverse=True)
+    resume_term_set = set(resume_terms)
+
+    if not skills:
+        short_circuit, reason = False, "no target skills to judge on"
+    elif not weights:
+        short_circuit, reason = False, "job description has no usable keywords"
+    elif len(resume_terms) < PRESCREEN_MIN_WORDS:
+        short_circuit, reason = False, "too little resume text to judge"
+    else:
+        short_circuit = confidence >= threshold
+        reason = "below relevance threshold" if short_circuit else "passed"
+
+    return ScreeningResult(
+        relevance=round(relevance, 3),
+        confidence=confidence,
+        short_circuit=short_circuit,
+        skill_coverage=round(skill_coverage, 3) if skill_coverage is not None else None,
+        keyword_coverage=round(keywords, 3),
+        skills_found=found,
+        skills_checked=len(skills),
+        matched_terms=[term for term in ranked if term in resume_term_set][:MAX_REPORTED_TERMS],
+        missing_terms=[term for term in ranked if term not in resume_term_set][:MAX_REPORTED_TERMS],
+        reason=reason,
+    )
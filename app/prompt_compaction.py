@@ -0,0 +1,189 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# --- Prompt compaction ---
+#
+# The scoring agents only need a handful of fields from the earlier stages.
+# Instead of pasting every stage's full model_dump() into each prompt, the
+# pipeline builds a digest per stage: only the fields that stage uses,
+# whitespace collapsed, duplicates dropped, serialized without indentation
+# and, if it is still over the stage's token budget, trimmed (longest text
+# first, then the tail of the longest lists).
+
+# Input token budget of each stage's prompt payload (the agent instructions
+# come on top); 0 disables trimming for that stage
+PROMPT_TOKEN_BUDGETS = {
+    "experience_scoring": int(os.getenv("PROMPT_TOKEN_BUDGET_EXPERIENCE", "1500")),
+    "education_scoring": int(os.getenv("PROMPT_TOKEN_BUDGET_EDUCATION", "800")),
+    "evaluation": int(os.getenv("PROMPT_TOKEN_BUDGET_EVALUATION", "2500")),
+}
+# Characters kept from a specialist's free-text breakdown in the auditor input
+PROMPT_MAX_BREAKDOWN_CHARS = int(os.getenv("PROMPT_MAX_BREAKDOWN_CHARS", "600"))
+# Text entries are never trimmed below this many characters
+MIN_ENTRY_CHARS = 80
+
+RESUME_SECTIONS = ("skills", "experience", "education", "projects", "achievements")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def compact_json(payload: Any) -> str:
+    """JSON without whitespace; non-ASCII (Indonesian) text is kept as-is, not \\u-escaped."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def trim_text(text: str, max_chars: int) -> str:
+    """Collapses whitespace and cuts the text at a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1].rsplit(" ", 1)[0]
+    return cut.rstrip(",;:.") + "…"
+
+
+def dedupe(entries: Iterable[str]) -> List[str]:
+    """Drops empty and repeated entries (case-insensitive), keeping the first occurrence."""
+    seen = set()
+    result = []
+    for entry in entries:
+        entry = " ".join(str(entry).split())
+        if entry and entry.casefold() not in seen:
+            seen.add(entry.casefold())
+            result.append(entry)
+    return result
+
+
+def resume_digest(resume_data: Dict[str, List[str]], sections: Sequence[str] = RESUME_SECTIONS) -> Dict[str, List[str]]:
+    """The requested sections of a ResumeExtractor dump, deduplicated; empty sections are left out."""
+    digest = {}
+    for section in sections:
+        entries = dedupe(resume_data.get(section) or [])
+        if entries:
+            digest[section] = entries
+    return digest
+
+
+def _longest_text(node: Any, parent: Any = None, key: Any = None, best: Optional[tuple] = None) -> Optional[tuple]:
+    """(length, container, key) of the longest string in a nested payload."""
+    if isinstance(node, str):
+        if best is None or len(node) > best[0]:
+            return len(node), parent, key
+        return best
+    items = node.items() if isinstance(node, dict) else enumerate(node) if isinstance(node, list) else ()
+    for child_key, child in items:
+        best = _longest_text(child, node, child_key, best)
+    return best
+
+
+def _longest_list(node: Any, best: Optional[list] = None) -> Optional[list]:
+    if isinstance(node, list):
+        if len(node) > 1 and (best is None or len(node) > len(best)):
+            best = node
+        for child in node:
+            best = _longest_list(child, best)
+    elif isinstance(node, dict):
+        for child in node.values():
+            best = _longest_list(child, best)
+    return best
+
+
+def fit_to_budget(payload: Dict[str, Any], budget: int, keep: Sequence[str] = ()) -> Dict[str, Any]:
+    """Trims `payload` in place until its compact JSON fits in `budget` tokens.
+
+    Top-level keys listed in `keep` (scores, job requirements) are never
+    touched. Text entries are shortened first, longest first; once every
+    entry is down to MIN_ENTRY_CHARS, entries are dropped from the end of the
+    longest list.
+    """
+    if not budget:
+        return payload
+    trimmable = [value for key, value in payload.items() if key not in keep and isinstance(value, (dict, list))]
+    while estimate_tokens(compact_json(payload)) > budget:
+        longest = None
+        for value in trimmable:
+            longest = _longest_text(value, best=longest)
+        if longest is not None and longest[0] > MIN_ENTRY_CHARS:
+            length, container, key = longest
+            container[key] = trim_text(container[key], max(MIN_ENTRY_CHARS, length * 2 // 3))
+            continue
+
+        longest_list = None
+        for value in trimmable:
+            longest_list = _longest_list(value, longest_list)
+        if longest_list is None:
+            break
+        longest_list.pop()
+    return payload
+
+
+# --- Stage inputs ---
+
+def _job_fields(job_requirements: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    return {field: job_requirements[field] for field in fields if job_requirements.get(field)}
+
+
+def experience_input(resume_data: Dict[str, Any], job_requirements: Dict[str, Any]) -> str:
+    payload = {
+        "job_requirements": _job_fields(
+            job_requirements, ("job_title", "experience_level", "required_skills", "preferred_skills")
+        ),
+        "resume": resume_digest(resume_data, ("experience", "projects", "achievements", "skills")),
+    }
+    return compact_json(fit_to_budget(payload, PROMPT_TOKEN_BUDGETS["experience_scoring"], keep=("job_requirements",)))
+
+
+def education_input(resume_data: Dict[str, Any], job_requirements: Dict[str, Any]) -> str:
+    payload = {
+        "job_requirements": _job_fields(
+            job_requirements, ("job_title", "education_requirements", "required_skills")
+        ),
+        "resume": resume_digest(resume_data, ("education", "achievements", "skills")),
+    }
+    return compact_json(fit_to_budget(payload, PROMPT_TOKEN_BUDGETS["education_scoring"], keep=("job_requirements",)))
+
+
+def evaluation_input(
+    scoring: Dict[str, Any],
+    job_requirements: Dict[str, Any],
+    resume_data: Dict[str, Any],
+    skills_found: Dict[str, Any],
+    experience_score: Dict[str, Any],
+    education_score: Dict[str, Any],
+) -> str:
+    """The auditor's input: each fact once, with the specialists' reasoning shortened.
+
+    Component scores only appear under `scoring`, not again in every
+    specialist's section, and skill contexts are left out since the found
+    skills and the resume itself are already included.
+    """
+    payload = {
+        "scoring": {
+            key: scoring[key]
+            for key in ("overall_score", "skill_score", "experience_score", "education_score", "breakdown")
+        },
+        "job_requirements": _job_fields(
+            job_requirements,
+            ("job_title", "required_skills", "preferred_skills", "experience_level", "education_requirements"),
+        ),
+        "skills": {
+            "found": skills_found["skills_found"],
+            "checked": skills_found["total_skills_checked"],
+            "match_percentage": skills_found["match_percentage"],
+        },
+        "experience": {
+            "years_experience": experience_score["years_experience"],
+            "relevant_roles": dedupe(experience_score["relevant_roles"]),
+            "breakdown": trim_text(experience_score["experience_breakdown"], PROMPT_MAX_BREAKDOWN_CHARS),
+        },
+        "education": {
+            "degree_match": trim_text(education_score["degree_match"], PROMPT_MAX_BREAKDOWN_CHARS),
+            "certifications": dedupe(education_score["certifications"]),
+            "breakdown": trim_text(education_score["education_breakdown"], PROMPT_MAX_BREAKDOWN_CHARS),
+        },
+        "resume": resume_digest(resume_data),
+    }
+    return compact_json(fit_to_budget(payload, PROMPT_TOKEN_BUDGETS["evaluation"], keep=("scoring", "job_requirements", "skills")))
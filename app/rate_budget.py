@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from shared_state import connect, is_shared, state_path
+
+# --- LLM rate budget ---
+#
+# The tokens-per-minute bucket and the rate-limit pause behind the LLM
+# scheduler. The provider's limits apply to the API key, not to a process, so
+# in a multi-worker deployment the budget is kept in SQLite and shared by all
+# workers: a 429 seen by one worker pauses the others too. Its calls may wait
+# up to SQLITE_BUSY_TIMEOUT_MS for another worker's write lock, so the
+# scheduler makes them from a worker thread (see `blocking`).
+
+
+class RateBudget:
+    """In-process token bucket refilled continuously at `tokens_per_minute`.
+
+    A budget of 0 tokens per minute never limits; pauses still apply.
+    """
+
+    # Whether calls may block on I/O, and so must stay off the event loop
+    blocking = False
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def take(self, tokens: int) -> float:
+        """Takes `tokens` from the bucket; returns 0, or the seconds until they are available."""
+        if not self.tokens_per_minute:
+            return 0.0
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return (tokens - self._tokens) * 60.0 / self.tokens_per_minute
+            self._tokens -= tokens
+            return 0.0
+
+    def refund(self, tokens: float) -> None:
+        """Returns tokens (or takes more, if negative) once a call's real usage is known."""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Stops admission for `seconds`, e.g. after a rate-limit error."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def paused_for(self) -> float:
+        """Seconds left in the current pause, 0 if admission is open."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def available(self) -> Optional[float]:
+        if not self.tokens_per_minute:
+            return None
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60.0,
+        )
+        self._refilled_at = now
+
+
+class SQLiteRateBudget(RateBudget):
+    """Token bucket in a SQLite row, shared by every process using the same file.
+
+    Times are wall-clock, since monotonic clocks are not comparable across
+    processes.
+    """
+
+    blocking = True
+
+    def __init__(self, tokens_per_minute: int, path: str, name: str = "default"):
+        super().__init__(tokens_per_minute)
+        self.path = path
+        self.name = name
+        self._conn = connect(path, isolation_level=None)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_budget ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                "refilled_at REAL NOT NULL, paused_until REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO llm_budget (name, tokens, refilled_at, paused_until) VALUES (?, ?, ?, 0)",
+                (name, float(tokens_per_minute), time.time()),
+            )
+
+    def take(self, tokens: int) -> float:
+        if not self.tokens_per_minute:
+            return 0.0
+
+        def spend(available: float) -> Tuple[float, float]:
+            if available < tokens:
+                return available, (tokens - available) * 60.0 / self.tokens_per_minute
+            return available - tokens, 0.0
+
+        return self._update(spend)
+
+    def refund(self, tokens: float) -> None:
+        if self.tokens_per_minute:
+            self._update(lambda available: (min(float(self.tokens_per_minute), available + tokens), None))
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE llm_budget SET paused_until = MAX(paused_until, ?) WHERE name = ?",
+                (time.time() + seconds, self.name),
+            )
+
+    def paused_for(self) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paused_until FROM llm_budget WHERE name = ?", (self.name,)
+            ).fetchone()
+        return max(0.0, row[0] - time.time())
+
+    def available(self) -> Optional[float]:
+        if not self.tokens_per_minute:
+            return None
+        return self._update(lambda available: (available, available))
+
+    def _update(self, spend: Callable[[float], Tuple[float, Any]]) -> Any:
+        """Refills the shared bucket, applies `spend` to it and stores the result, atomically.
+
+        `spend` gets the available tokens and returns (tokens left, return value).
+        """
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes cannot
+            # both read the same balance and spend it twice
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, refilled_at = self._conn.execute(
+                    "SELECT tokens, refilled_at FROM llm_budget WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                available = min(
+                    float(self.tokens_per_minute),
+                    tokens + max(0.0, now - refilled_at) * self.tokens_per_minute / 60.0,
+                )
+                remaining, result = spend(available)
+                self._conn.execute(
+                    "UPDATE llm_budget SET tokens = ?, refilled_at = ? WHERE name = ?",
+                    (remaining, now, self.name),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+def create_rate_budget(tokens_per_minute: int) -> RateBudget:
+    """Builds the budget configured through LLM_BUDGET_BACKEND / LLM_BUDGET_PATH.
+
+    The backend defaults to sqlite when SHARED_STATE_DIR is set (multi-worker
+    mode) and to memory otherwise.
+    """
+    backend = os.getenv("LLM_BUDGET_BACKEND", "sqlite" if is_shared() else "memory").lower()
+    if backend == "sqlite":
+        return SQLiteRateBudget(tokens_per_minute, os.getenv("LLM_BUDGET_PATH", state_path("llm_budget.sqlite3")))
+    if backend == "memory":
+        return RateBudget(tokens_per_minute)
+    raise ValueError(f"Unknown rate budget backend for LLM_BUDGET_BACKEND: {backend}")
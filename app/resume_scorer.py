@@ -1,21 +1,73 @@
 import asyncio
+import contextvars
+import hashlib
 import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
 from datetime import datetime
-from dataclasses import dataclass
-from typing import List
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
 from pydantic import BaseModel, Field
-from openai import AsyncOpenAI
-from PyPDF2 import PdfReader
 import os
 from dotenv import load_dotenv
-from agents import Agent, Runner, function_tool, RunContextWrapper
 
-# Load environment variables
+# Load environment variables (before the modules below read their settings)
 load_dotenv()
 
-# Initialize OpenAI client
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-MODEL = os.getenv("MODEL_CHOICE", "gpt-4-turbo-preview")
+from text_extraction import ResumeSource, extract_resume_text_async, resume_bytes
+from cache import create_cache
+import metrics
+from skill_matcher import compute_skill_score, is_preferred, match_skills, normalize, parse_skills
+import prompt_compaction
+from prompt_compaction import estimate_tokens
+from model_backends import agent_model, backend_for, close_clients, model_name
+from prescreen import (
+    PRESCREEN_CONFIDENCE,
+    PRESCREEN_ENABLED,
+    PRESCREEN_MIN_WORDS,
+    PRESCREEN_SKILL_WEIGHT,
+    ScreeningResult,
+    screen,
+)
+from rate_budget import RateBudget, create_rate_budget
+from singleflight import Deadline, SingleFlight, WaitTimeout, current_flight, deadline_of
+
+if TYPE_CHECKING:
+    from agents import Agent, ModelProvider, RunConfig
+
+# "openai" (default) or "stub": a local stand-in model with canned, schema-valid
+# answers after STUB_LLM_LATENCY seconds, for offline runs and benchmarks
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.5"))
+if LLM_BACKEND not in ("openai", "stub"):
+    raise ValueError(f"Unknown model backend for LLM_BACKEND: {LLM_BACKEND}")
+
+# Ask the skill extractor agent about skills the local matcher could not find
+SKILL_LLM_FALLBACK = os.getenv("SKILL_LLM_FALLBACK", "false").lower() in ("1", "true", "yes")
+
+# Extracted text and structured ResumeExtractor output, keyed by the SHA-256
+# of the uploaded resume bytes and the resume extractor's fingerprint (see
+# resume_cache_key), so a new model or prompt does not reuse old extractions
+resume_cache = create_cache("resume", max_entries=1024, ttl_seconds=7 * 24 * 3600)
+
+# JobRequirements analysis, keyed by the SHA-256 of the normalized job
+# description and the job analyzer's fingerprint (see job_cache_key)
+job_cache = create_cache("job", max_entries=256, ttl_seconds=24 * 3600)
+
+# Outputs of completed scoring stages, keyed by a hash of the agent, model,
+# instructions and input, so a retried request resumes where it failed
+checkpoint_cache = create_cache("checkpoint", max_entries=4096, ttl_seconds=3600)
+
+# Complete score_resume results, keyed by result_cache_key()
+result_cache = create_cache("result", max_entries=1024, ttl_seconds=24 * 3600)
+
+# Identical requests and stages in flight at the same time share one run (see singleflight.py)
+score_flights = SingleFlight("score")
+job_flights = SingleFlight("job_analysis")
+resume_flights = SingleFlight("resume")
 
 # --- Models for structured outputs ---
 
@@ -27,6 +79,7 @@ class ResumeExtractor(BaseModel):
     achievements: List[str] = Field(description="List of achievements")
 
 class JobRequirements(BaseModel):
+    job_title: str = Field(description="Job title exactly as stated in the job description")
     required_skills: List[str] = Field(description="Required skills for the job")
     preferred_skills: List[str] = Field(description="Preferred skills for the job")
     experience_level: str = Field(description="Required experience level")
@@ -77,29 +130,15 @@ class ScoringContext:
         if self.session_start is None:
             self.session_start = datetime.now()
 
-# --- Tools ---
-
-@function_tool
-async def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from a PDF file."""
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
-
-@function_tool
-async def read_text_file(file_path: str) -> str:
-    """Read text from a text file."""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        return file.read()
-
 # --- Specialized Agents ---
+#
+# Only the instructions are defined at import time. The Agent objects, their
+# API clients and the agents SDK itself (slow to import) are loaded on first
+# use, or by warm_up() from the app's lifespan, so a worker starts serving
+# right away.
 
-resume_extractor_agent = Agent(
-    name="Resume Extractor",
-    instructions="""
-    You are a resume analysis expert. Your task is to extract and structure information from resumes. What is given is the path to a resume. Help extract the text using your tools then
+RESUME_EXTRACTOR_INSTRUCTIONS = """
+    You are a resume analysis expert. Your task is to extract and structure information from resumes. What is given is the full text of a resume.
     Focus on identifying:
     - Technical and soft skills
     - Work experience with details
@@ -110,33 +149,26 @@ resume_extractor_agent = Agent(
     Make sure to follow the exact schema provided in the ResumeExtractor model.
     The output MUST include all required fields: skills, experience, education, projects, and achievements.
     Do not add any additional fields that are not in the schema.
-    """,
-    tools=[extract_text_from_pdf, read_text_file],
-    output_type=ResumeExtractor,
-    model=MODEL
-)
+    """
 
-skill_extractor_agent = Agent(
-    name="Skill Extractor Agent",
-    instructions="""
+SKILL_EXTRACTOR_INSTRUCTIONS = """
     You are a specialized Skill Extractor Agent designed to analyze resumes and identify specific skills that are present in the candidate's background.
     
     INPUT FORMAT:
     You will receive a JSON object with:
-    - resume_path: Path to the resume file (PDF or text)
+    - resume_text: The full text of the resume
     - target_skills: array of strings containing the skills to check for (comma-separated or list format)
     
     YOUR TASK:
-    1. Extract text from the provided resume using the resume_path
-    2. Parse the target_skills string into a list of individual skills
-    3. Analyze the resume content thoroughly to identify which target skills are present. 
-    4. Calculate a skill score based on the following methodology:
+    1. Parse the target_skills string into a list of individual skills
+    2. Analyze the resume_text thoroughly to identify which target skills are present. 
+    3. Calculate a skill score based on the following methodology:
        - Required skills: 2 points per match
        - Preferred skills: 1 point per match
        - Missing required skills: -3 points per miss
        - Calculate as: (Total skill points / Max possible skill points) * 4.0
        - Max Points: 4.0
-    5. Return detailed information about skill matches including context and statistics
+    4. Return detailed information about skill matches including context and statistics
     
     ANALYSIS APPROACH:
     - Look for skills in multiple sections: experience, education, projects, certifications
@@ -165,15 +197,9 @@ skill_extractor_agent = Agent(
     - Calculate skill score using the exact methodology specified
     - Follow the SkillsFound schema exactly with all required fields
     - Handle cases where target_skills might be empty or malformed
-    """,
-    tools=[extract_text_from_pdf, read_text_file],
-    output_type=SkillsFound,
-    model=MODEL
-)
+    """
 
-job_analyzer_agent = Agent(
-    name="Job Requirements Analyzer",
-    instructions="""
+JOB_ANALYZER_INSTRUCTIONS = """
     You are a STRICT job requirements extraction expert. Your task is to EXTRACT ONLY EXPLICITLY MENTIONED requirements from job descriptions.
     
     RULES:
@@ -187,6 +213,7 @@ job_analyzer_agent = Agent(
     GOOD (exact extraction):
     - Job says: "Must know Python and SQL" → required_skills: ["Python", "SQL"]
     - Job says nothing about education → education_requirements: []
+    - Job is titled "SALES OFFICER" → job_title: "SALES OFFICER"
     
     BAD (making assumptions):
     - Job says nothing about education but you add: ["Bachelor's degree"] ← WRONG
@@ -196,14 +223,9 @@ job_analyzer_agent = Agent(
     - Must follow the EXACT schema in JobRequirements model
     - Only include what's EXPLICITLY in the job description
     - Empty fields should be EMPTY LISTS, never null or placeholder text
-    """,
-    output_type=JobRequirements,
-    model=MODEL
-)
+    """
 
-experience_scoring_agent = Agent(
-    name="Experience Scoring Specialist",
-    instructions="""
+EXPERIENCE_SCORING_INSTRUCTIONS = """
     You are an experience scoring specialist. Your task is to evaluate the candidate's work experience against job requirements.
     If no expereince listed determine by yourself based on the job title how relevant the work is. Be strict on how relevant a candidates expereice is to their job description
     
@@ -239,14 +261,9 @@ experience_scoring_agent = Agent(
     - experience_breakdown: Detailed explanation of scoring
     
     Make sure to follow the exact schema provided in the ExperienceScore model.
-    """,
-    output_type=ExperienceScore,
-    model=MODEL
-)
+    """
 
-education_scoring_agent = Agent(
-    name="Education Scoring Specialist",
-    instructions="""
+EDUCATION_SCORING_INSTRUCTIONS = """
     You are an education scoring specialist. Your task is to evaluate the candidate's educational background against job requirements. If there is no education requirement listed 
     make a decision based on the job description if the education is relevant
     
@@ -278,54 +295,20 @@ education_scoring_agent = Agent(
     - education_breakdown: Detailed explanation of scoring
     
     Make sure to follow the exact schema provided in the EducationScore model.
-    """,
-    output_type=EducationScore,
-    model=MODEL
-)
+    """
 
-final_scoring_agent = Agent(
-    name="Final Scoring Coordinator",
-    instructions="""
-    You are a final scoring coordinator. Your task is to combine all individual scores and provide a comprehensive evaluation.
+RESUME_SCORING_INSTRUCTIONS = """
+    You are a resume scoring auditor. Your tasks:
     
     INPUT:
-    You will receive scores from:
-    - Skill Extractor Agent (skill_score: 0.0 to 4.0)
-    - Experience Scoring Agent (experience_score: 0.0 to 4.5)
-    - Education Scoring Agent (education_score: 0.0 to 1.0)
-    - Resume data and job requirements for context
-    
-    FINAL SCORING METHODOLOGY:
-    - Overall Score = skill_score + experience_score + education_score + other_factors
-    - Other factors (0.0 to 0.5): Projects, achievements, additional qualifications
-    - Maximum possible score: 10.0
-    
-    EVALUATION CRITERIA:
-    1. EXCELLENT (8.0-10.0): Strong match across all categories
-    2. GOOD (6.0-7.9): Good match with minor gaps
-    3. AVERAGE (4.0-5.9): Moderate match with some gaps
-    4. POOR (0.0-3.9): Significant mismatches or missing requirements
-    
-    OUTPUT REQUIREMENTS:
-    - overall_score: Sum of all component scores (0.0 to 10.0)
-    - skill_score: From skill extractor agent
-    - experience_score: From experience scoring agent
-    - education_score: From education scoring agent
-    - strengths: List of candidate's key strengths
-    - weaknesses: List of candidate's key weaknesses
-    - breakdown: Detailed explanation of final scoring
-    - summary: Overall assessment of candidate fit
-    
-    Make sure to follow the exact schema provided in the ResumeScore model.
-    """,
-    output_type=ResumeScore,
-    model=MODEL
-)
-
-resume_scoring_agent = Agent(
-    name="Resume Scoring Checker",
-    instructions="""
-    You are a resume scoring auditor. Your tasks:
+    You will receive:
+    - scoring: the component scores from the specialist agents (skill_score: 0.0 to 4.0,
+      experience_score: 0.0 to 4.5, education_score: 0.0 to 1.0) and overall_score, which is
+      their sum plus other factors (0.0 to 0.5 for projects and achievements)
+    - A compact digest of the job requirements, the resume (skills, experience, education,
+      projects, achievements) and the specialists' findings (skills found, years of experience,
+      relevant roles, degree match, certifications and their shortened breakdowns). Long entries
+      may be cut short with "…"
     
     1. VALIDATE SCORING LOGIC:
        - Verify scores follow the defined methodology
@@ -338,154 +321,1300 @@ resume_scoring_agent = Agent(
        - Identify critical missing requirements
     
     3. ADJUST SCORES IF NEEDED:
-       - Reduce inflated scores with justification
-       - Add penalty points for major mismatches
+       - Reduce inflated component scores with justification
+       - Express penalties for major mismatches by lowering the affected component scores
+       - overall_score is recomputed from the component scores after your review, so do not
+         adjust it directly
     
     4. FINAL OUTPUT:
        - Provide detailed reasoning in STRICT INDONESIAN
        - Include exact mismatch percentages
        - Final score should accurately represent the candidate
+       - Write the candidate's strengths, weaknesses, a detailed scoring breakdown and an
+         overall summary of their fit, all in STRICT INDONESIAN
+    
+    EVALUATION CRITERIA:
+    1. EXCELLENT (8.0-10.0): Strong match across all categories
+    2. GOOD (6.0-7.9): Good match with minor gaps
+    3. AVERAGE (4.0-5.9): Moderate match with some gaps
+    4. POOR (0.0-3.9): Significant mismatches or missing requirements
     
     IMPORTANT: Be extremely critical of mismatches. If the job description is irrelevant, the score MUST be low and STRICTLY GIVE THE RESULT BACK IN INDONESIAN.
-    """,
-    model=MODEL,
-    output_type=FinalOutput,
+    """
+
+# Name, instructions, output type and model backend (see model_backends.py) of each agent
+AGENT_SPECS: Dict[str, dict] = {
+    "resume_extractor_agent": dict(
+        name="Resume Extractor", instructions=RESUME_EXTRACTOR_INSTRUCTIONS, output_type=ResumeExtractor, backend="RESUME_EXTRACTOR"
+    ),
+    "skill_extractor_agent": dict(
+        name="Skill Extractor Agent", instructions=SKILL_EXTRACTOR_INSTRUCTIONS, output_type=SkillsFound, backend="SKILL_EXTRACTOR"
+    ),
+    "job_analyzer_agent": dict(
+        name="Job Requirements Analyzer", instructions=JOB_ANALYZER_INSTRUCTIONS, output_type=JobRequirements, backend="JOB_ANALYZER"
+    ),
+    "experience_scoring_agent": dict(
+        name="Experience Scoring Specialist", instructions=EXPERIENCE_SCORING_INSTRUCTIONS, output_type=ExperienceScore, backend="EXPERIENCE_SCORING"
+    ),
+    "education_scoring_agent": dict(
+        name="Education Scoring Specialist", instructions=EDUCATION_SCORING_INSTRUCTIONS, output_type=EducationScore, backend="EDUCATION_SCORING"
+    ),
+    "resume_scoring_agent": dict(
+        name="Resume Scoring Checker", instructions=RESUME_SCORING_INSTRUCTIONS, output_type=FinalOutput, backend="RESUME_SCORING"
+    ),
+}
+
+_agents: Dict[str, "Agent"] = {}
+_agents_lock = threading.Lock()
+
+
+def _configure_sdk() -> None:
+    from agents import set_tracing_disabled
+
+    # Traces are exported to OpenAI, which needs an OpenAI key even when every
+    # agent runs against another endpoint
+    if not os.getenv("OPENAI_API_KEY"):
+        set_tracing_disabled(True)
+    if LLM_BACKEND == "stub" and model_provider is None:
+        from stub_model import StubModelProvider
+        use_model_provider(StubModelProvider(latency=STUB_LLM_LATENCY))
+
+
+def get_agent(name: str) -> "Agent":
+    """The agent registered under `name` in AGENT_SPECS, built on first use."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    with _agents_lock:
+        if name not in _agents:
+            from agents import Agent
+
+            if not _agents:
+                _configure_sdk()
+            spec = dict(AGENT_SPECS[name])
+            # The stub backend resolves models by name and needs no API client
+            model = agent_model(spec.pop("backend"), with_client=LLM_BACKEND == "openai")
+            _agents[name] = Agent(model=model, **spec)
+        return _agents[name]
+
+
+_agent_fingerprints: Dict[str, str] = {}
+
+
+def agent_fingerprint(name: str) -> str:
+    """Hash of the backend, model, instructions and output schema behind an agent's outputs."""
+    fingerprint = _agent_fingerprints.get(name)
+    if fingerprint is None:
+        spec = AGENT_SPECS[name]
+        backend = backend_for(spec["backend"])
+        parts = [
+            LLM_BACKEND,
+            name,
+            backend.model,
+            backend.base_url or "",
+            spec["instructions"],
+            json.dumps(spec["output_type"].model_json_schema(), sort_keys=True),
+        ]
+        fingerprint = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+        _agent_fingerprints[name] = fingerprint
+    return fingerprint
+
+
+def warm_up() -> None:
+    """Builds every agent (and imports the SDK) ahead of the first request."""
+    for name in AGENT_SPECS:
+        get_agent(name)
+
+
+async def close_agents() -> None:
+    """Drops the agents and closes their shared HTTP connection pool."""
+    with _agents_lock:
+        _agents.clear()
+    await close_clients()
+
+
+def __getattr__(name: str):
+    # Keeps `from resume_scorer import skill_extractor_agent` working
+    if name in AGENT_SPECS:
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Model backend ---
+
+# Overrides the agents' own backends (see model_backends.py) when set
+model_provider: Optional["ModelProvider"] = None
+
+
+def use_model_provider(provider: Optional["ModelProvider"]) -> None:
+    """Resolves every agent's model name through `provider` instead of its backend (None restores them)."""
+    global model_provider
+    model_provider = provider
+
+
+def _run_config(agent: "Agent") -> Optional["RunConfig"]:
+    if model_provider is None:
+        return None
+    from agents import RunConfig
+
+    # The stand-in has nothing worth tracing
+    return RunConfig(model=model_provider.get_model(model_name(agent.model)), tracing_disabled=True)
+
+
+# --- LLM scheduler ---
+#
+# Every model call of every request goes through one process-wide scheduler.
+# It caps the number of calls in flight and the tokens spent per minute, and
+# hands free slots to requests in turn so one large request cannot starve the
+# others. Calls that hit a rate limit back off (with jitter, honouring
+# Retry-After) and hold back the whole queue while the provider recovers.
+# Calls that fail on a dropped connection or a 5xx are retried with the same
+# backoff, without holding back the queue. The openai clients themselves do not
+# retry (LLM_CLIENT_MAX_RETRIES=0), so every attempt goes through the queue.
+
+# Model calls allowed in flight at once, across all requests of this process
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+# Token budget per minute (prompt estimate plus expected output); 0 disables it.
+# Shared by all worker processes when SHARED_STATE_DIR is set (see rate_budget.py)
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+# Output tokens assumed for a call until its real usage is known
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "1000"))
+# Retries of a rate-limited or failed call, and the backoff bounds in seconds
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+# Identifies the request a model call belongs to, for fair queueing
+request_key: contextvars.ContextVar[str] = contextvars.ContextVar("request_key", default="default")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """The server's Retry-After hint in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """Admits model calls under an in-flight cap and a tokens-per-minute budget.
+
+    Waiting calls are queued per request and served round-robin, so a burst
+    of uploads shares the available capacity instead of racing for it. The
+    token bucket and rate-limit pauses live in `budget`, which may be shared
+    with other processes; a shared (SQLite) budget is only ever read and
+    updated from worker threads, so a busy database stalls admission but never
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        budget: Optional[RateBudget] = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.tokens_per_minute = tokens_per_minute
+        self.budget = budget or RateBudget(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._in_flight = 0
+        # request key -> FIFO of (future, tokens); insertion order is the round-robin order
+        self._queues: "OrderedDict[str, Deque[tuple]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        # Admits queued calls; at most one runs at a time
+        self._admission: Optional[asyncio.Task] = None
+
+    async def stats(self) -> dict:
+        stats = {
+            "in_flight": self._in_flight,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "queued_requests": len(self._queues),
+        }
+        available = await self._budget_call(self.budget.available)
+        paused_for = await self._budget_call(self.budget.paused_for)
+        return {
+            **stats,
+            "tokens_available": round(available) if self.tokens_per_minute else None,
+            "paused_seconds": round(paused_for, 2),
+        }
+
+    async def run(self, call: Callable[[], Awaitable], tokens: int, stage: str):
+        """Awaits `call()` once admitted, retrying it on rate-limit and transient errors.
+
+        `call` must return the agents RunResult, so the token estimate can be
+        settled against the usage it reports.
+        """
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        for attempt in range(self.max_retries + 1):
+            wait_start = time.perf_counter()
+            tokens = await self._acquire(tokens)
+            metrics.llm_queue_wait.observe(time.perf_counter() - wait_start, stage=stage)
+            try:
+                result = await call()
+            except RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = await self._backoff(attempt, _retry_after(e))
+                print(f"[{stage}] rate limited, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                metrics.record_retry(stage)
+                await asyncio.sleep(delay)
+                continue
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = await self._backoff(attempt, None, pause=False)
+                print(f"[{stage}] {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                metrics.record_retry(stage)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                self._release()
+
+            used = sum(
+                response.usage.input_tokens + response.usage.output_tokens
+                for response in result.raw_responses
+            )
+            if used:
+                await self._settle(tokens, used)
+            return result
+
+    # -- Admission --
+
+    async def _acquire(self, tokens: int) -> int:
+        if self.tokens_per_minute:
+            # A call larger than the whole budget could never be admitted
+            tokens = min(tokens, self.tokens_per_minute)
+
+        future = asyncio.get_running_loop().create_future()
+        key = request_key.get()
+        self._queues.setdefault(key, deque()).append((future, tokens))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller was cancelled, give the slot back
+                self._release()
+            else:
+                self._discard(key, future)
+            raise
+        return tokens
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    async def _settle(self, estimated: int, used: int) -> None:
+        """Corrects the token bucket once the real usage of a call is known."""
+        await self._budget_call(self.budget.refund, estimated - used)
+
+    async def _budget_call(self, function: Callable, *args):
+        """Calls a budget method, in a worker thread if the budget may block."""
+        if self.budget.blocking:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    def _discard(self, key: str, future: asyncio.Future) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        for entry in queue:
+            if entry[0] is future:
+                queue.remove(entry)
+                break
+        if not queue:
+            del self._queues[key]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Starts admitting queued calls, unless that is already under way.
+
+        A running admission sees every change made meanwhile, since it
+        re-checks the queues and the capacity after each budget call.
+        """
+        if self._admission is None or self._admission.done():
+            self._admission = asyncio.get_running_loop().create_task(self._admit())
+
+    async def _admit(self) -> None:
+        """Admits queued calls while there is capacity, one request at a time."""
+        while self._queues and self._in_flight < self.max_in_flight:
+            key = next(iter(self._queues))
+            queue = self._queues[key]
+            future, tokens = queue[0]
+            if future.done():
+                # Cancelled while waiting
+                queue.popleft()
+                if not queue:
+                    del self._queues[key]
+                continue
+
+            try:
+                paused_for = await self._budget_call(self.budget.paused_for)
+                if paused_for > 0:
+                    self._schedule_wakeup(paused_for)
+                    return
+                wait = await self._budget_call(self.budget.take, tokens)
+                if wait > 0:
+                    self._schedule_wakeup(wait)
+                    return
+                if future.done():
+                    # Cancelled while the tokens were taken, give them back
+                    await self._budget_call(self.budget.refund, tokens)
+                    continue
+            except Exception as e:
+                # The budget could not be read (e.g. the database stayed
+                # locked); fail this call rather than stall the whole queue
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            queue.popleft()
+            # Move this request to the back of the line
+            del self._queues[key]
+            if queue:
+                self._queues[key] = queue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None and not self._wakeup.cancelled():
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def _backoff(self, attempt: int, retry_after: Optional[float], pause: bool = True) -> float:
+        """Full-jitter exponential backoff; with `pause`, admission pauses for everyone as well."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if pause:
+            await self._budget_call(self.budget.pause, delay)
+        return delay
+
+
+llm_scheduler = LLMScheduler(budget=create_rate_budget(LLM_TOKENS_PER_MINUTE))
+
+# --- Pipeline helpers ---
+
+# In-memory resume content
+ResumeContent = Union[bytes, bytearray, memoryview]
+
+# Called with (event, payload) as each pipeline stage completes
+StageCallback = Callable[[str, dict], Awaitable[None]]
+
+# Times a stage is re-run, with the validation error fed back, when its
+# output cannot be parsed or has the wrong type
+LLM_REPAIR_RETRIES = int(os.getenv("LLM_REPAIR_RETRIES", "2"))
+# Characters of the validation error quoted back to the model
+MAX_REPAIR_ERROR_CHARS = 800
+
+# Set for a request that must be scored afresh: the stages skip cached and
+# checkpointed outputs (but still save theirs)
+request_refresh: contextvars.ContextVar[bool] = contextvars.ContextVar("request_refresh", default=False)
+# Checkpoint keys read or written by the current request, stored with its
+# result so invalidating the result drops them too
+request_checkpoints: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "request_checkpoints", default=None
 )
 
-async def score_resume(
-    resume_path: str,
-    job_description: str,
-    target_skills: List[str],
-) -> dict:
-    """Sequentially runs the pipeline and returns a dictionary of results."""
+
+class AgentOutputError(TypeError):
+    """An agent's final output is not of the expected type."""
+
+
+# --- Deadlines ---
+#
+# A request may carry a deadline (an absolute time.monotonic() timestamp),
+# inherited by all of its stage tasks through a context variable. Each model
+# stage gets an equal share of the remaining time with the stages that still
+# have to run after it, and is cancelled once its share is used up, which
+# also stops its queued or in-flight model call.
+
+request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+# Model stages that still run one after another once a stage has finished
+SEQUENTIAL_STAGES_AFTER = {
+    "text_extraction": 3,
+    "job_analysis": 2,
+    "resume_extraction": 2,
+    "skill_extraction": 1,
+    "experience_scoring": 1,
+    "education_scoring": 1,
+    "evaluation": 0,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the pipeline finished."""
+
+
+def deadline_in(seconds: Optional[float]) -> Optional[float]:
+    """The deadline `seconds` from now; None (no deadline) for None or 0."""
+    return time.monotonic() + seconds if seconds else None
+
+
+def current_deadline() -> Deadline:
+    """The deadline the current code runs under: its request's, or that of the
+    shared call it runs in (see singleflight.py), which may still move.
+    """
+    flight = current_flight.get()
+    return flight if flight is not None else request_deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left until the current request's deadline, None without one."""
+    deadline = deadline_of(current_deadline())
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def _coalesced(flights: SingleFlight, key: str, call: Callable[[], Awaitable], deadline: Deadline):
+    """Joins or starts `call` on `flights`, waiting for it until the caller's `deadline`.
+
+    Refreshing requests only share calls with each other.
+    """
+    if request_refresh.get():
+        key = f"{key}:refresh"
     try:
-        # STEP 1: Run Resume Extractor Agent
-        resume_extraction_result = await Runner.run(
-            resume_extractor_agent,
-            resume_path
-        )
+        return await flights.do(key, call, deadline)
+    except WaitTimeout as e:
+        raise DeadlineExceeded(str(e)) from None
 
-        if not isinstance(resume_extraction_result.final_output, ResumeExtractor):
-            raise TypeError("Resume Extractor returned wrong type")
-    
-        print("\nResume Extraction Result:")
-        print(resume_extraction_result)
 
-        resume_data = resume_extraction_result.final_output
+def stage_budget(stage: str) -> Optional[float]:
+    """Seconds the given stage may take, None without a deadline."""
+    remaining = remaining_time()
+    if remaining is None:
+        return None
+    if remaining <= 0:
+        raise DeadlineExceeded(f"Deadline passed before {stage} could start")
+    return remaining / (SEQUENTIAL_STAGES_AFTER.get(stage, 0) + 1)
 
-        # STEP 2: Run Skill Extractor Agent
-        skill_extraction_input = json.dumps({
-            "resume_path": resume_path,
-            "target_skills": target_skills
-        })
 
-        skill_extraction_result = await Runner.run(
-            skill_extractor_agent,
-            skill_extraction_input
+async def _within_budget(stage: str, coro):
+    """Awaits `coro`, cancelling it once the stage's share of the deadline is used up.
+
+    Inside a shared call the deadline can move while the stage runs (a caller
+    with a later deadline joined), so the share is re-checked when it ends.
+    """
+    try:
+        budget = stage_budget(stage)
+    except DeadlineExceeded:
+        coro.close()
+        raise
+    if budget is None:
+        return await coro
+    if current_flight.get() is None:
+        try:
+            return await asyncio.wait_for(coro, budget)
+        except TimeoutError:
+            raise DeadlineExceeded(f"{stage} did not finish within its {budget:.1f}s share of the deadline") from None
+
+    start = time.monotonic()
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            deadline = deadline_of(current_deadline())
+            if deadline is None:
+                return await task
+            end = start + (deadline - start) / (SEQUENTIAL_STAGES_AFTER.get(stage, 0) + 1)
+            await asyncio.wait({task}, timeout=max(0.0, end - time.monotonic()))
+            if task.done():
+                return task.result()
+            if deadline_of(current_deadline()) == deadline:
+                raise DeadlineExceeded(
+                    f"{stage} did not finish within its {end - start:.1f}s share of the deadline"
+                )
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _repair_input(agent_input: str, output_type: type, error: Exception) -> str:
+    """The original input plus the reason the previous answer was rejected."""
+    return (
+        f"{agent_input}\n\n"
+        f"YOUR PREVIOUS ANSWER WAS REJECTED: {prompt_compaction.trim_text(str(error), MAX_REPAIR_ERROR_CHARS)}\n"
+        f"Answer again with a single JSON object that matches the {output_type.__name__} schema exactly."
+    )
+
+
+def _checkpoint_key(agent: "Agent", agent_input: str) -> str:
+    fingerprint = "\0".join([agent.name, model_name(agent.model), agent.instructions, agent_input])
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+async def _run_agent(
+    agent_name: str,
+    agent_input: str,
+    output_type: type,
+    label: str,
+    checkpoint: bool = False,
+):
+    """Runs a single agent, re-running it with feedback while its output fails validation.
+
+    With `checkpoint`, a completed output is saved under a hash of the agent
+    and its input, and returned from there on the next identical call, e.g.
+    when a request that failed at a later stage is retried, unless the
+    request is a refresh.
+    """
+    agent = _agents.get(agent_name)
+    if agent is None:
+        # Building an agent imports the SDK; keep that (or waiting for the
+        # lifespan warm-up to finish it) off the event loop
+        agent = await asyncio.to_thread(get_agent, agent_name)
+    from agents.exceptions import ModelBehaviorError
+
+    stage = metrics.current_stage.get() or agent.name
+    key = _checkpoint_key(agent, agent_input) if checkpoint else None
+    if key is not None:
+        checkpoints = request_checkpoints.get()
+        if checkpoints is not None:
+            checkpoints.append(key)
+    if key is not None and not request_refresh.get():
+        saved = await checkpoint_cache.get_async(key)
+        if saved is not None:
+            print(f"[{stage}] resumed from checkpoint")
+            metrics.checkpoint_hits.inc(stage=stage)
+            return output_type.model_validate(saved)
+
+    attempt_input = agent_input
+    for attempt in range(LLM_REPAIR_RETRIES + 1):
+        try:
+            output = await _within_budget(stage, _run_agent_once(agent, attempt_input, output_type, label, stage))
+            break
+        except (ModelBehaviorError, AgentOutputError) as e:
+            if attempt == LLM_REPAIR_RETRIES:
+                raise
+            print(f"[{stage}] invalid output, re-running with the error ({attempt + 1}/{LLM_REPAIR_RETRIES}): {e}")
+            metrics.record_repair(stage)
+            attempt_input = _repair_input(agent_input, output_type, e)
+
+    if key is not None:
+        await checkpoint_cache.set_async(key, output.model_dump())
+    return output
+
+
+async def _run_agent_once(agent: "Agent", agent_input: str, output_type: type, label: str, stage: str):
+    """Runs an agent once through the LLM scheduler and checks the type of its final output."""
+    from agents import Runner
+
+    tokens = estimate_tokens(agent.instructions + agent_input) + LLM_OUTPUT_TOKEN_ESTIMATE
+    result = await llm_scheduler.run(
+        lambda: Runner.run(agent, agent_input, run_config=_run_config(agent)), tokens, stage
+    )
+
+    metrics.record_llm_usage(
+        stage,
+        input_tokens=sum(response.usage.input_tokens for response in result.raw_responses),
+        output_tokens=sum(response.usage.output_tokens for response in result.raw_responses),
+        requests=sum(response.usage.requests for response in result.raw_responses),
+        tool_calls=sum(1 for item in result.new_items if item.type == "tool_call_item"),
+    )
+
+    if not isinstance(result.final_output, output_type):
+        raise AgentOutputError(
+            f"{label} returned {type(result.final_output).__name__}, expected {output_type.__name__}"
         )
 
-        if not isinstance(skill_extraction_result.final_output, SkillsFound):
-            raise TypeError("Skill Extractor returned wrong type")
+    print(f"\n{label} Result:")
+    print(result)
 
-        print("\nSkill Extraction Result:")
-        print(skill_extraction_result)
+    return result.final_output
 
-        skills_found = skill_extraction_result.final_output
+def resume_cache_key(resume_hash: str) -> str:
+    """Resume cache key: the resume bytes' SHA-256 and the resume extractor's fingerprint.
 
-        # STEP 3: Run Job Analyzer Agent
-        job_analysis_input = json.dumps({
-            "job_description": job_description
-        })
+    The text does not depend on the model, but is stored with the extraction.
+    """
+    return f"{resume_hash}:{agent_fingerprint('resume_extractor_agent')}"
+
+async def _extract_text(resume_content: ResumeContent, resume_hash: str) -> str:
+    """Pre-processing stage: parses the resume into plain text off the event loop.
+
+    Concurrent calls for the same resume share one parse; the text is cached.
+    """
+    async def parse() -> str:
+        resume_text = await _within_budget("text_extraction", extract_resume_text_async(resume_content))
+        if not resume_text.strip():
+            raise ValueError("No text could be extracted from the resume")
+        await resume_cache.set_async(resume_cache_key(resume_hash), {"resume_text": resume_text})
+        return resume_text
 
+    return await _coalesced(resume_flights, f"text:{resume_hash}", parse, current_deadline())
 
-        # STEP 4: Run Experience Scoring Agent
-        experience_input = json.dumps({
-            "resume_data": resume_data.model_dump(),
-            "job_description": job_description
+async def extract_resume(resume_text: str, resume_hash: str) -> ResumeExtractor:
+    """Runs the resume extractor; concurrent calls for the same resume share one run.
+
+    The extraction is cached along with the text.
+    """
+    async def extract() -> ResumeExtractor:
+        resume_data = await _run_agent("resume_extractor_agent", resume_text, ResumeExtractor, "Resume Extractor")
+        await resume_cache.set_async(resume_cache_key(resume_hash), {
+            "resume_text": resume_text,
+            "resume_data": resume_data.model_dump()
         })
+        return resume_data
 
-        experience_score_result = await Runner.run(
-            experience_scoring_agent,
-            experience_input
-        )
+    return await _coalesced(resume_flights, f"extraction:{resume_hash}", extract, current_deadline())
+
+def normalize_job_description(job_description: str) -> str:
+    """Collapses whitespace so trivially different copies of a posting share a cache entry."""
+    return " ".join(job_description.split())
+
+def job_description_hash(job_description: str) -> str:
+    return hashlib.sha256(normalize_job_description(job_description).encode("utf-8")).hexdigest()
 
-        if not isinstance(experience_score_result.final_output, ExperienceScore):
-            raise TypeError("Experience Scoring Agent returned wrong type")
+def job_cache_key(job_hash: str) -> str:
+    """Job cache key: the posting's hash and the job analyzer's fingerprint."""
+    return f"{job_hash}:{agent_fingerprint('job_analyzer_agent')}"
 
-        print("\nExperience Scoring Result:")
-        print(experience_score_result)
+async def analyze_job(job_description: str) -> JobRequirements:
+    """Runs the job analyzer once per distinct (normalized) job description.
 
-        experience_score = experience_score_result.final_output
+    Concurrent calls for the same posting share one analysis.
+    """
+    job_hash = job_description_hash(job_description)
+    return await _coalesced(
+        job_flights, job_hash, lambda: _analyze_job(job_description, job_hash), current_deadline()
+    )
 
-        # STEP 5: Run Education Scoring Agent
-        education_input = json.dumps({
-            "resume_data": resume_data.model_dump(),
-            "job_description": job_description
+async def _analyze_job(job_description: str, job_hash: str) -> JobRequirements:
+    normalized = normalize_job_description(job_description)
+
+    cached_job = None if request_refresh.get() else await job_cache.get_async(job_cache_key(job_hash))
+    if cached_job is not None:
+        print("[job_analysis] cache hit")
+        return JobRequirements.model_validate(cached_job)
+
+    job_analysis_input = json.dumps({
+        "job_description": normalized
+    })
+    job_requirements = await _run_agent(
+        "job_analyzer_agent", job_analysis_input, JobRequirements, "Job Requirements Analyzer"
+    )
+    await job_cache.set_async(job_cache_key(job_hash), job_requirements.model_dump())
+    return job_requirements
+
+async def extract_skills(
+    resume_text: str,
+    target_skills: Optional[List[str]],
+    job_requirements: JobRequirements,
+) -> SkillsFound:
+    """Matches target skills locally and computes the skill score deterministically.
+
+    Target skills listed among the job's preferred skills count as preferred,
+    every other target skill as required. Without target skills the job's own
+    required and preferred skills are checked. The skill extractor agent is
+    only consulted, when SKILL_LLM_FALLBACK is enabled, for skills the local
+    matcher could not find.
+    """
+    skills = parse_skills(target_skills)
+    if not skills:
+        skills = parse_skills(job_requirements.required_skills + job_requirements.preferred_skills)
+
+    matches = match_skills(resume_text, skills)
+    unresolved = [match.skill for match in matches if not match.found]
+
+    if unresolved and SKILL_LLM_FALLBACK:
+        skill_extraction_input = json.dumps({
+            "resume_text": resume_text,
+            "target_skills": unresolved
         })
+        llm_skills = await _run_agent("skill_extractor_agent", skill_extraction_input, SkillsFound, "Skill Extractor")
+        llm_context = dict(zip(
+            (normalize(skill) for skill in llm_skills.skills_found),
+            llm_skills.skill_context + [""] * len(llm_skills.skills_found),
+        ))
+        for match in matches:
+            if not match.found and normalize(match.skill) in llm_context:
+                match.found = True
+                match.method = "llm"
+                match.context = llm_context[normalize(match.skill)]
 
-        education_score_result = await Runner.run(
-            education_scoring_agent,
-            education_input
-        )
+    preferred = {skill for skill in skills if is_preferred(skill, job_requirements.preferred_skills)}
+    found = [match for match in matches if match.found]
+    required_found = sum(1 for match in found if match.skill not in preferred)
+    preferred_found = len(found) - required_found
 
-        if not isinstance(education_score_result.final_output, EducationScore):
-            raise TypeError("Education Scoring Agent returned wrong type")
+    return SkillsFound(
+        skills_found=[match.skill for match in found],
+        total_skills_checked=len(skills),
+        match_percentage=round(len(found) / len(skills), 2) if skills else 0.0,
+        skill_context=[f"{match.skill} ({match.method}): {match.context}" for match in found],
+        skill_score=compute_skill_score(
+            required_found, len(skills) - len(preferred), preferred_found, len(preferred)
+        ),
+    )
 
-        print("\nEducation Scoring Result:")
-        print(education_score_result)
+def other_factors_score(resume_data: ResumeExtractor) -> float:
+    """Other factors (0.0 to 0.5): 0.1 per listed project or achievement."""
+    return round(min(0.5, 0.1 * (len(resume_data.projects) + len(resume_data.achievements))), 2)
 
-        education_score = education_score_result.final_output
+def compute_resume_score(
+    skill_score: float,
+    experience_score: float,
+    education_score: float,
+    other_factors: float,
+) -> ResumeScore:
+    """Builds the numeric part of a ResumeScore; overall_score is the plain sum of the components."""
+    skill_score = round(min(4.0, max(0.0, skill_score)), 2)
+    experience_score = round(min(4.5, max(0.0, experience_score)), 2)
+    education_score = round(min(1.0, max(0.0, education_score)), 2)
+    overall_score = round(min(10.0, skill_score + experience_score + education_score + other_factors), 2)
 
-        # STEP 6: Run Final Scoring Agent
-        final_scoring_input = json.dumps({
-            "skill_score": skills_found.skill_score,
-            "experience_score": experience_score.experience_score,
-            "education_score": education_score.education_score,
-            "resume_data": resume_data.model_dump(),
-            "skills_found": skills_found.model_dump(),
-            "job_description": job_description
+    return ResumeScore(
+        overall_score=overall_score,
+        skill_score=skill_score,
+        experience_score=experience_score,
+        education_score=education_score,
+        strengths=[],
+        weaknesses=[],
+        breakdown=(
+            f"skill_score {skill_score} + experience_score {experience_score} + "
+            f"education_score {education_score} + other_factors {other_factors} = {overall_score}"
+        ),
+        summary="",
+    )
+
+async def _final_score(
+    skills_found: SkillsFound,
+    experience_score: ExperienceScore,
+    education_score: EducationScore,
+    other_factors: float,
+) -> ResumeScore:
+    """Final scoring stage, computed locally from the component scores."""
+    return compute_resume_score(
+        skills_found.skill_score,
+        experience_score.experience_score,
+        education_score.education_score,
+        other_factors,
+    )
+
+async def _prescreen(resume_text: str, job_description: str, target_skills: Optional[List[str]]) -> ScreeningResult:
+    """Pre-screen stage: local relevance check of the resume against the posting."""
+    screening = screen(resume_text, job_description, target_skills)
+    metrics.prescreen_decisions.inc(outcome="short_circuit" if screening.short_circuit else "passed")
+    return screening
+
+def screened_out_scores(
+    screening: ScreeningResult,
+    job_requirements: JobRequirements,
+    skills_found: SkillsFound,
+) -> Tuple[ExperienceScore, EducationScore, ResumeScore, FinalOutput]:
+    """Experience, education, scoring and evaluation for a resume rejected by the pre-screen."""
+    not_assessed = "Tidak dinilai: resume tidak relevan dengan lowongan (pre-screen)."
+    experience_score = ExperienceScore(
+        experience_score=0.0, years_experience=0.0, relevant_roles=[], experience_breakdown=not_assessed
+    )
+    education_score = EducationScore(
+        education_score=0.0, degree_match="Tidak dinilai", certifications=[], education_breakdown=not_assessed
+    )
+
+    result = compute_resume_score(skills_found.skill_score, 0.0, 0.0, 0.0)
+    weaknesses = [
+        f"{len(screening.skills_found)} dari {screening.skills_checked} skill target ditemukan"
+        if screening.skills_checked else "Skill yang dibutuhkan tidak ditemukan",
+    ]
+    if screening.missing_terms:
+        weaknesses.append(f"Kata kunci lowongan tidak ditemukan: {', '.join(screening.missing_terms[:5])}")
+    result = result.model_copy(update={
+        "weaknesses": weaknesses,
+        "breakdown": (
+            f"{result.breakdown}\n\nPre-screen: relevansi {screening.relevance} "
+            f"(skill {screening.skill_coverage}, kata kunci {screening.keyword_coverage}); "
+            f"pengalaman dan pendidikan tidak dinilai."
+        ),
+        "summary": (
+            f"Tidak relevan untuk posisi {job_requirements.job_title}: kecocokan skill dan kata kunci "
+            f"dengan lowongan sangat rendah, sehingga penilaian lengkap dilewati."
+        ),
+    })
+    evaluation = FinalOutput(
+        reasoning=(
+            f"Pre-screen lokal: relevansi {screening.relevance}, keyakinan tidak relevan "
+            f"{screening.confidence}. Tidak ada tahap model yang dijalankan untuk resume ini."
+        ),
+        score=result,
+    )
+    return experience_score, education_score, result, evaluation
+
+# --- Result cache ---
+#
+# Scoring a resume against a posting and skills it was already scored against
+# returns the stored result without running any stage. The key covers all the
+# result depends on: the resume bytes, the normalized job description, the
+# target skills (in any order or case) and the pipeline version, which
+# fingerprints each agent's model, instructions and output schema along with
+# the local scoring settings, so a changed prompt or model is never answered
+# from results of the old one. The resume and job caches are keyed by the
+# fingerprint of the agent that fills them and the checkpoints by the agent's
+# model and instructions, so the stages behind a new result re-run as well.
+# Degraded results are not cached.
+
+# Bump when local code that shapes results changes (skill matching, prompt
+# digests, score arithmetic); prompts and models are fingerprinted already
+SCORING_VERSION = "2"
+
+# Stage events replayed to `on_stage` for a cached result, and the field each reports
+RESULT_EVENTS = [
+    ("job_analysis", "job_requirements"),
+    ("prescreen", "prescreen"),
+    ("skills", "skills_found"),
+    ("experience", "experience_score"),
+    ("education", "education_score"),
+    ("final", "scoring"),
+    ("evaluation", "evaluation"),
+]
+
+_pipeline_version: Optional[str] = None
+
+
+def pipeline_version() -> str:
+    """Fingerprint of the models, prompts and settings behind a scoring result."""
+    global _pipeline_version
+    if _pipeline_version is None:
+        parts = [
+            SCORING_VERSION,
+            str(SKILL_LLM_FALLBACK),
+            str(PRESCREEN_ENABLED),
+            str(PRESCREEN_CONFIDENCE),
+            str(PRESCREEN_SKILL_WEIGHT),
+            str(PRESCREEN_MIN_WORDS),
+        ]
+        parts += [agent_fingerprint(name) for name in sorted(AGENT_SPECS)]
+        _pipeline_version = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+    return _pipeline_version
+
+
+def result_cache_key(resume_hash: str, job_description: str, target_skills: Optional[List[str]]) -> str:
+    """Result cache key for a resume (by the SHA-256 of its bytes), posting and skills."""
+    skills = sorted({normalize(skill) for skill in parse_skills(target_skills)})
+    fingerprint = json.dumps([resume_hash, job_description_hash(job_description), skills, pipeline_version()])
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+async def _cache_result(cache_key: str, result: dict) -> dict:
+    """Stores a fresh result (unless degraded) and marks it as a cache miss."""
+    if not result["degraded"]:
+        stored = {name: value for name, value in result.items() if name not in ("timings", "usage")}
+        await result_cache.set_async(cache_key, {
+            "cached_at": time.time(),
+            "result": stored,
+            "checkpoints": list(request_checkpoints.get() or []),
         })
+    result["cache"] = {"hit": False, "key": cache_key}
+    return result
+
+
+def invalidate_results(cache_key: Optional[str] = None) -> int:
+    """Drops one cached result, or all of them without a key; returns how many were dropped.
+
+    The stage checkpoints behind the dropped results go with them, so the
+    next request for the same inputs runs the scoring stages again.
+    """
+    if cache_key is None:
+        dropped = len(result_cache)
+        result_cache.clear()
+        checkpoint_cache.clear()
+        return dropped
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        return 0
+    for checkpoint_key in cached.get("checkpoints", []):
+        checkpoint_cache.delete(checkpoint_key)
+    result_cache.delete(cache_key)
+    return 1
+
+
+async def _extract_skills_after(job_task: asyncio.Task, resume_text: str, target_skills: Optional[List[str]]) -> SkillsFound:
+    """Skill matching stage; waits for the job analysis to tell required from preferred skills."""
+    return await extract_skills(resume_text, target_skills, await job_task)
+
+async def _emit(on_stage: Optional[StageCallback], event: str, output: BaseModel) -> None:
+    """Reports a completed stage's output to the caller's stage callback, if any."""
+    if on_stage is not None:
+        await on_stage(event, output.model_dump())
+
+async def _timed_stage(name: str, coro, timings: Dict[str, float]):
+    """Awaits a pipeline stage and records its wall-clock duration in seconds."""
+    stage_token = metrics.current_stage.set(name)
+    start = time.perf_counter()
+    failed = True
+    try:
+        output = await coro
+        failed = False
+        return output
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.current_stage.reset(stage_token)
+        metrics.record_stage(name, elapsed, failed=failed)
+        timings[name] = round(elapsed, 3)
+        print(f"[{name}] finished in {timings[name]:.2f}s")
+
+async def score_resume(
+    resume: ResumeSource,
+    job_description: str,
+    target_skills: List[str],
+    on_stage: Optional[StageCallback] = None,
+    deadline: Optional[float] = None,
+    refresh: bool = False,
+) -> dict:
+    """Runs the pipeline as a dependency graph and returns a dictionary of results.
 
-        final_score_result = await Runner.run(
-            final_scoring_agent,
-            final_scoring_input
+    `resume` is the uploaded content (bytes, a memoryview or a binary file
+    object); a file path is still accepted for legacy callers and read once.
+
+    The resume text is extracted once up front and shared by every agent;
+    both the text and the resume extraction are cached by the resume's content
+    hash, so re-scoring a known resume skips those stages entirely. The job
+    description is analyzed once per distinct posting and the resulting
+    JobRequirements replace the raw text in every downstream prompt. Stages
+    that only depend on the raw inputs are started together:
+
+        job_analysis ──> (experience, education, final, evaluation)
+
+                        ┌─> resume_extraction ─┬─> experience ─┐
+        text_extraction ┤                      └─> education ──┼─> final ─> evaluation
+                        └─> skill_extraction ──────────────────┘
+
+    Skills are matched locally (see skill_matcher.py) rather than by an agent,
+    and the final score is the arithmetic sum of the component scores; the
+    auditor (evaluation) reviews it and writes the narrative fields.
+
+    The result includes per-stage wall-clock `timings` and the per-stage model
+    `usage` (tokens, requests, tool calls, retries, repairs, estimated cost).
+
+    A stage whose model output fails validation is re-run on its own with the
+    error fed back (see _run_agent). The experience, education and evaluation
+    outputs are checkpointed, so retrying a failed request only re-runs the
+    stages that had not completed. If the evaluation (audit) still fails, the
+    unaudited scores are returned and `degraded` lists "evaluation".
+
+    Right after text extraction a local pre-screen (see prescreen.py) checks
+    the resume against the posting and target skills; a clearly irrelevant
+    resume skips resume extraction, experience, education and evaluation and
+    gets a low, skill-only score with a short explanation. The screening
+    details are returned under `prescreen`.
+
+    If `on_stage` is given it is awaited with (event, payload) as soon as each
+    stage completes, where event is one of job_analysis, prescreen, extraction,
+    skills, experience, education, final or evaluation and payload is the stage
+    output.
+
+    `deadline` is the time.monotonic() by which the result is needed (see
+    deadline_in()). Stages are given shares of the remaining time and
+    DeadlineExceeded is raised once a stage runs out of it; a late evaluation
+    degrades to the unaudited scores instead. Cancelling the call cancels every
+    stage and its model calls.
+
+    Results are cached by result_cache_key() (see the result cache section);
+    a hit returns in milliseconds and replays the stage events to `on_stage`.
+    `cache` in the result tells whether it was a hit, its key and, for a hit,
+    its age in seconds. `refresh` re-scores from scratch: it skips the
+    lookup, the cached resume extraction and job analysis and the stage
+    checkpoints, and replaces the entry.
+
+    Identical calls (same result cache key and `refresh`) made while one is
+    running join it rather than start another pipeline. The shared pipeline
+    runs until the latest of the callers' deadlines, and each caller waits for
+    it until its own. Calls with an `on_stage` callback always run their own
+    pipeline.
+    """
+    resume_content = resume_bytes(resume)
+    resume_hash = hashlib.sha256(resume_content).hexdigest()
+    cache_key = result_cache_key(resume_hash, job_description, target_skills)
+
+    def run(callback: Optional[StageCallback]) -> Awaitable[dict]:
+        return _score_resume(
+            resume_content, resume_hash, cache_key, job_description, target_skills, callback, deadline, refresh
         )
 
-        if not isinstance(final_score_result.final_output, ResumeScore):
-            raise TypeError("Final Scoring Agent returned wrong type")
+    if on_stage is not None:
+        # Stage events are reported to this caller only
+        return await run(on_stage)
+    # Every caller gets its own copy, which it may pop fields from
+    refresh_token = request_refresh.set(refresh)
+    try:
+        return dict(await _coalesced(
+            score_flights, cache_key, lambda: run(None), deadline if deadline is not None else current_deadline()
+        ))
+    finally:
+        request_refresh.reset(refresh_token)
 
-        print("\nFinal Scoring Result:")
-        print(final_score_result)
+async def _score_resume(
+    resume_content: ResumeContent,
+    resume_hash: str,
+    cache_key: str,
+    job_description: str,
+    target_skills: List[str],
+    on_stage: Optional[StageCallback],
+    deadline: Optional[float],
+    refresh: bool,
+) -> dict:
+    """The pipeline of score_resume for one caller, given the hashed resume."""
+    timings: Dict[str, float] = {}
+    usage: Dict[str, dict] = {}
+    pending: List[asyncio.Task] = []
+    pipeline_start = time.perf_counter()
+    # Stage tasks inherit this context, so every model call of this request
+    # adds to the same usage breakdown
+    usage_token = metrics.request_usage.set(usage)
+    # ... and are queued by the LLM scheduler as one request
+    key_token = request_key.set(uuid.uuid4().hex)
+    # ... and share its deadline
+    deadline_token = request_deadline.set(deadline if deadline is not None else request_deadline.get())
+    # ... and whether it bypasses the caches, and collect its checkpoints
+    refresh_token = request_refresh.set(refresh)
+    checkpoints_token = request_checkpoints.set([])
 
-        result = final_score_result.final_output
+    async def stage(name: str, coro, event: str):
+        """Times a stage and reports its output to `on_stage` once it completes."""
+        output = await _timed_stage(name, coro, timings)
+        await _emit(on_stage, event, output)
+        return output
 
-        # STEP 7: Run Final Evaluation Agent
-        evaluation_input = json.dumps({
-            "result": result.model_dump(),
-            "job_description": job_description,
-            "resume_data": resume_data.model_dump(),
-            "skills_found": skills_found.model_dump(),
-            "experience_score": experience_score.model_dump(),
-            "education_score": education_score.model_dump()
-        })
+    try:
+        # STEP 0: A resume already scored against this posting and skills
+        cached = None if refresh else await result_cache.get_async(cache_key)
+        metrics.result_cache_lookups.inc(outcome="refresh" if refresh else "hit" if cached else "miss")
+        if cached is not None:
+            print("[result] cache hit")
+            result = cached["result"]
+            if on_stage is not None:
+                for event, field in RESULT_EVENTS:
+                    if result.get(field) is not None:
+                        await on_stage(event, result[field])
+            timings["total"] = round(time.perf_counter() - pipeline_start, 3)
+            return {
+                **result,
+                "cache": {"hit": True, "key": cache_key, "age": round(time.time() - cached["cached_at"], 1)},
+                "timings": timings,
+                "usage": usage,
+            }
+
+        # The job analysis only needs the job description, start it right away
+        job_task = asyncio.create_task(stage(
+            "job_analysis",
+            analyze_job(job_description),
+            "job_analysis",
+        ))
+        pending.append(job_task)
+
+        # STEP 1: Extract the resume text once for every downstream agent
+        cached_resume = await resume_cache.get_async(resume_cache_key(resume_hash)) or {}
+
+        if "resume_text" in cached_resume:
+            print("[text_extraction] cache hit")
+            resume_text = cached_resume["resume_text"]
+        else:
+            resume_text = await _timed_stage(
+                "text_extraction",
+                _extract_text(resume_content, resume_hash),
+                timings,
+            )
+
+        # STEP 1b: Clearly irrelevant resumes skip every model stage but the
+        # (per-posting, cached) job analysis
+        screening: Optional[ScreeningResult] = None
+        if PRESCREEN_ENABLED:
+            screening = await _timed_stage(
+                "prescreen",
+                _prescreen(resume_text, job_description, target_skills),
+                timings,
+            )
+            if on_stage is not None:
+                await on_stage("prescreen", asdict(screening))
+
+        if screening is not None and screening.short_circuit:
+            print(f"[prescreen] short-circuited, relevance {screening.relevance}")
+            job_requirements = await job_task
+            skills_found = await stage(
+                "skill_extraction",
+                extract_skills(resume_text, target_skills, job_requirements),
+                "skills",
+            )
+            experience_score, education_score, result, resume_evaluation = screened_out_scores(
+                screening, job_requirements, skills_found
+            )
+            for event, output in (
+                ("experience", experience_score),
+                ("education", education_score),
+                ("final", result),
+                ("evaluation", resume_evaluation),
+            ):
+                await _emit(on_stage, event, output)
+
+            timings["total"] = round(time.perf_counter() - pipeline_start, 3)
+            metrics.pipeline_duration.observe(timings["total"])
+            return await _cache_result(cache_key, {
+                "job_requirements": job_requirements.model_dump(),
+                "skills_found": skills_found.model_dump(),
+                "experience_score": experience_score.model_dump(),
+                "education_score": education_score.model_dump(),
+                "scoring": result.model_dump(),
+                "evaluation": resume_evaluation.model_dump(),
+                "prescreen": asdict(screening),
+                "degraded": [],
+                "timings": timings,
+                "usage": usage
+            })
+
+        # STEP 2: Resume extraction and skill matching only need the resume text
+        resume_data: Optional[ResumeExtractor] = None
+        if "resume_data" in cached_resume and not refresh:
+            print("[resume_extraction] cache hit")
+            resume_data = ResumeExtractor.model_validate(cached_resume["resume_data"])
+            await _emit(on_stage, "extraction", resume_data)
+        else:
+            resume_task = asyncio.create_task(stage(
+                "resume_extraction",
+                extract_resume(resume_text, resume_hash),
+                "extraction",
+            ))
+            pending.append(resume_task)
+
+        skills_task = asyncio.create_task(stage(
+            "skill_extraction",
+            _extract_skills_after(job_task, resume_text, target_skills),
+            "skills",
+        ))
+        pending.append(skills_task)
 
-        resume_evaluation = await Runner.run(
-            resume_scoring_agent,
-            evaluation_input
+        if resume_data is None:
+            resume_data = await resume_task
+
+        job_requirements = await job_task
+
+        # STEP 3: Experience and education scoring both only need the resume data
+        # Each agent gets a compact digest of just the fields it scores on
+        resume_dump = resume_data.model_dump()
+        job_dump = job_requirements.model_dump()
+        experience_input = prompt_compaction.experience_input(resume_dump, job_dump)
+        education_input = prompt_compaction.education_input(resume_dump, job_dump)
+
+        experience_task = asyncio.create_task(stage(
+            "experience_scoring",
+            _run_agent(
+                "experience_scoring_agent", experience_input, ExperienceScore, "Experience Scoring Agent",
+                checkpoint=True,
+            ),
+            "experience",
+        ))
+        education_task = asyncio.create_task(stage(
+            "education_scoring",
+            _run_agent(
+                "education_scoring_agent", education_input, EducationScore, "Education Scoring Agent",
+                checkpoint=True,
+            ),
+            "education",
+        ))
+        pending.extend([experience_task, education_task])
+
+        skills_found, experience_score, education_score = await asyncio.gather(
+            skills_task, experience_task, education_task
+        )
+
+        # STEP 4: Final scoring is plain arithmetic over the component scores
+        other_factors = other_factors_score(resume_data)
+        result = await stage(
+            "final_scoring",
+            _final_score(skills_found, experience_score, education_score, other_factors),
+            "final",
+        )
+
+        # STEP 5: The auditor reviews the scores and writes the narrative
+        evaluation_input = prompt_compaction.evaluation_input(
+            result.model_dump(),
+            job_dump,
+            resume_dump,
+            skills_found.model_dump(),
+            experience_score.model_dump(),
+            education_score.model_dump(),
         )
 
-        if not isinstance(resume_evaluation.final_output, FinalOutput):
-            raise TypeError("Resume Scoring Coordinator returned wrong type")
+        degraded: List[str] = []
+        try:
+            resume_evaluation = await stage(
+                "evaluation",
+                _run_agent(
+                    "resume_scoring_agent", evaluation_input, FinalOutput, "Resume Scoring Coordinator",
+                    checkpoint=True,
+                ),
+                "evaluation",
+            )
+        except Exception as e:
+            # Every score is already computed; return them unaudited rather
+            # than discard the paid-for stages
+            print(f"[evaluation] failed, returning the unaudited scores: {e}")
+            degraded.append("evaluation")
+            resume_evaluation = FinalOutput(
+                reasoning=f"Audit unavailable ({type(e).__name__}); the scores below have not been reviewed.",
+                score=result,
+            )
+            await _emit(on_stage, "evaluation", resume_evaluation)
+        else:
+            # Keep the audited overall score consistent with its (possibly adjusted) components
+            audited = resume_evaluation.score
+            audited_numbers = compute_resume_score(
+                audited.skill_score, audited.experience_score, audited.education_score, other_factors
+            )
+            resume_evaluation.score = audited.model_copy(update={
+                "overall_score": audited_numbers.overall_score,
+                "skill_score": audited_numbers.skill_score,
+                "experience_score": audited_numbers.experience_score,
+                "education_score": audited_numbers.education_score,
+            })
+
+            # The pre-audit scores, with the narrative written by the auditor
+            result = result.model_copy(update={
+                "strengths": audited.strengths,
+                "weaknesses": audited.weaknesses,
+                "summary": audited.summary,
+                "breakdown": f"{result.breakdown}\n\n{audited.breakdown}",
+            })
+
+        timings["total"] = round(time.perf_counter() - pipeline_start, 3)
+        metrics.pipeline_duration.observe(timings["total"])
 
         # Return a dictionary with all the serializable data
-        return {
+        return await _cache_result(cache_key, {
+            "job_requirements": job_requirements.model_dump(),
             "skills_found": skills_found.model_dump(),
             "experience_score": experience_score.model_dump(),
             "education_score": education_score.model_dump(),
             "scoring": result.model_dump(),
-            "evaluation": resume_evaluation.final_output.model_dump()
-        }
+            "evaluation": resume_evaluation.model_dump(),
+            "prescreen": asdict(screening) if screening is not None else None,
+            "degraded": degraded,
+            "timings": timings,
+            "usage": usage
+        })
 
     except Exception as e:
         print(f"\nError scoring resume: {str(e)}")
-        raise 
\ No newline at end of file
+        if isinstance(e, DeadlineExceeded):
+            metrics.requests_abandoned.inc(reason="deadline")
+        raise
+
+    finally:
+        metrics.request_usage.reset(usage_token)
+        request_key.reset(key_token)
+        request_deadline.reset(deadline_token)
+        request_refresh.reset(refresh_token)
+        request_checkpoints.reset(checkpoints_token)
+        # Don't leave sibling stages running (and spending tokens) after a failure
+        for task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Siblings that failed along with the stage that raised (e.g.
+                # on the same deadline) have nobody left to report to
+                task.exception()
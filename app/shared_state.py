@@ -0,0 +1,35 @@
+import os
+import sqlite3
+
+# --- Shared state ---
+#
+# State that every worker process of a multi-worker deployment must see (the
+# resume and job caches, the job queue and the LLM rate budget) is kept in
+# SQLite files under SHARED_STATE_DIR. The files are opened in WAL mode, so
+# readers never wait for the writer and several processes can use them at
+# once. Without SHARED_STATE_DIR each process keeps that state in memory,
+# unless a component is explicitly configured otherwise.
+
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+# Milliseconds to wait for another process's write lock before giving up
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def is_shared() -> bool:
+    """Whether state should be shared between worker processes."""
+    return bool(SHARED_STATE_DIR)
+
+
+def state_path(filename: str, default_dir: str = ".cache") -> str:
+    """Where a SQLite state file lives: SHARED_STATE_DIR if set, else `default_dir`."""
+    return os.path.join(SHARED_STATE_DIR or default_dir, filename)
+
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    """Opens a SQLite file for use by several threads and processes."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL: a power loss can only drop the last commits, not corrupt the file
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
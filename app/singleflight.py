@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+
+import metrics
+
+# --- Request coalescing ---
+#
+# Identical work that is already in flight is joined instead of started again.
+# The first caller for a key starts the call as a task; callers arriving with
+# the same key while it runs await that task and get the same result (or
+# exception).
+#
+# Callers may have different deadlines. The task runs until the latest of
+# them (without one as soon as a caller without a deadline joins); code in
+# the task reads it through current_flight. Each caller only waits until its
+# own deadline and then gets WaitTimeout. A caller that times out or is
+# cancelled only stops waiting; the task itself is cancelled once no caller
+# waits for it any more. Coalescing is per process: with several workers,
+# the shared caches only take over once the first call has finished.
+
+T = TypeVar("T")
+
+
+class WaitTimeout(TimeoutError):
+    """A caller's deadline passed while it waited for a shared call."""
+
+
+class Flight:
+    """A call in flight, with the deadlines of the callers waiting for it."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        # time.monotonic() timestamps, None (no deadline) or the Flight a
+        # caller itself runs in, whose deadline may still move
+        self._deadlines: List["Deadline"] = []
+
+    def add_deadline(self, deadline: "Deadline") -> None:
+        self._deadlines.append(deadline)
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """The latest of the callers' deadlines, None if one of them has none."""
+        deadlines = [deadline_of(deadline) for deadline in self._deadlines]
+        if not deadlines or any(deadline is None for deadline in deadlines):
+            return None
+        return max(deadlines)
+
+
+Deadline = Union[None, float, Flight]
+
+# The flight the current code runs in, if any
+current_flight: contextvars.ContextVar[Optional[Flight]] = contextvars.ContextVar("current_flight", default=None)
+
+
+def deadline_of(deadline: Deadline) -> Optional[float]:
+    return deadline.deadline if isinstance(deadline, Flight) else deadline
+
+
+class SingleFlight:
+    """At most one call per key in flight; concurrent callers share its result."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, Flight] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]], deadline: Deadline = None) -> T:
+        """Awaits `call()`, or the call already in flight for `key`, until `deadline`."""
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.get_loop() is asyncio.get_running_loop():
+            metrics.coalesced_calls.inc(flight=self.name)
+        else:
+            flight = Flight()
+            flight.task = asyncio.create_task(self._run(flight, call))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+        flight.add_deadline(deadline)
+
+        flight.waiters += 1
+        try:
+            return await self._wait(flight, deadline)
+        except (asyncio.CancelledError, WaitTimeout):
+            if flight.waiters == 1 and not flight.task.done():
+                # The last caller left: nobody needs the result any more, and
+                # a caller arriving meanwhile must not join a cancelled call
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    @staticmethod
+    async def _run(flight: Flight, call: Callable[[], Awaitable[T]]) -> T:
+        current_flight.set(flight)
+        return await call()
+
+    async def _wait(self, flight: Flight, deadline: Deadline):
+        while True:
+            limit = deadline_of(deadline)
+            if limit is None:
+                return await asyncio.shield(flight.task)
+            await asyncio.wait({flight.task}, timeout=max(0.0, limit - time.monotonic()))
+            if flight.task.done():
+                return flight.task.result()
+            # A deadline taken from an enclosing flight may have moved meanwhile
+            if deadline_of(deadline) == limit:
+                raise WaitTimeout(f"Deadline passed while waiting for the shared {self.name} call")
+
+    def _forget(self, key: str, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Every caller has seen the exception, if any
+            flight.task.exception()
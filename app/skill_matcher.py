@@ -0,0 +1,245 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# --- Deterministic skill matching ---
+#
+# Checks target skills against resume text without a model call: the text is
+# tokenized and normalized, every skill is expanded through an alias
+# dictionary, and each candidate phrase is looked up exactly and then fuzzily
+# (to absorb typos and inflections). Skills that are not found are reported as
+# unresolved so the caller can decide whether to ask the LLM about them.
+
+# Groups of interchangeable skill names. The first entry is the canonical
+# name; Indonesian equivalents are included since most of our resumes are in
+# Indonesian. Only true synonyms belong in a group: every target skill not
+# marked preferred counts as required, so a sibling product (MySQL for
+# PostgreSQL, Bitbucket for GitHub) would turn a missing skill into a match.
+SKILL_ALIASES: List[List[str]] = [
+    # Technical
+    ["JavaScript", "JS", "ECMAScript"],
+    ["TypeScript", "TS"],
+    ["Python", "Python3", "Py"],
+    ["React", "React.js", "ReactJS"],
+    ["Node.js", "NodeJS", "Node"],
+    ["SQL", "T-SQL"],
+    ["PostgreSQL", "Postgres"],
+    ["MongoDB", "Mongo"],
+    ["AWS", "Amazon Web Services"],
+    ["GCP", "Google Cloud", "Google Cloud Platform"],
+    ["Kubernetes", "K8s"],
+    ["Machine Learning", "ML"],
+    ["Data Analysis", "Data Analytics", "Analisis Data", "Analisa Data"],
+    ["Excel", "Microsoft Excel", "MS Excel"],
+    ["PowerPoint", "Microsoft PowerPoint", "MS PowerPoint"],
+    ["Microsoft Office", "MS Office", "Office 365"],
+    ["CRM", "Customer Relationship Management"],
+    # Soft skills
+    ["Communication", "Komunikasi", "Communication Skills", "Berkomunikasi"],
+    ["Leadership", "Kepemimpinan", "Memimpin", "Team Leader", "Leader"],
+    ["Teamwork", "Team Work", "Kerja Sama", "Kerjasama", "Kerja Tim", "Team Player"],
+    ["Time Management", "Manajemen Waktu"],
+    ["Problem Solving", "Pemecahan Masalah", "Problem Solver"],
+    ["Emotional Intelligence", "Kecerdasan Emosional"],
+    ["Creativity", "Kreativitas", "Kreatif", "Creative"],
+    ["Public Speaking", "Presentation", "Presentasi"],
+    # Business
+    ["Project Management", "Manajemen Proyek", "Project Manager"],
+    ["Strategic Planning", "Perencanaan Strategis", "Strategic Plan"],
+    ["Operations Management", "Manajemen Operasional", "Operational Management"],
+    ["Sales", "Penjualan", "Selling"],
+    ["Lead Generation", "Prospecting", "Prospek", "Mencari Pelanggan"],
+    ["Marketing", "Pemasaran"],
+    ["Customer Service", "Pelayanan Pelanggan", "Layanan Pelanggan", "Customer Care"],
+    ["Negotiation", "Negosiasi"],
+    ["Account Management", "Key Account", "Account Manager"],
+    ["Telemarketing", "Telesales"],
+]
+
+# Aliases that also mean something else in a resume: "ML" millilitres, "TS" a
+# timestamp, "Node" a delivery node, "Leader" any role with a team. A target
+# skill written as one of them still matches the rest of its group, but they
+# are never looked for on behalf of the other names ("TS" finds TypeScript,
+# "TypeScript" does not find "TS").
+ONE_WAY_ALIASES = {"JS", "TS", "Py", "ML", "Node", "Leader"}
+
+# Separators that join several skills into one target, e.g. "Sales & Lead Generation"
+COMPOUND_SEPARATORS = re.compile(r"\s*(?:&|/|\band\b|\bdan\b)\s*", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[\w+#]+(?:\.[\w+#]+)*")
+
+REQUIRED_MATCH_POINTS = 2.0
+PREFERRED_MATCH_POINTS = 1.0
+REQUIRED_MISS_PENALTY = 3.0
+MAX_SKILL_SCORE = 4.0
+
+
+def normalize(text: str) -> str:
+    """Casefolds and strips accents so "Négociation" and "negociation" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def parse_skills(target_skills: Optional[Iterable[str]]) -> List[str]:
+    """Splits comma/semicolon/newline separated entries and drops duplicates."""
+    skills = []
+    seen = set()
+    for entry in target_skills or []:
+        for skill in re.split(r"[,;\n]", entry or ""):
+            skill = skill.strip()
+            if skill and normalize(skill) not in seen:
+                seen.add(normalize(skill))
+                skills.append(skill)
+    return skills
+
+
+@dataclass
+class SkillMatch:
+    skill: str
+    found: bool
+    method: Optional[str] = None  # exact, alias or fuzzy
+    matched_term: Optional[str] = None
+    context: Optional[str] = None
+
+
+class SkillMatcher:
+    """Matches skills against one resume text."""
+
+    def __init__(
+        self,
+        text: str,
+        aliases: Sequence[Sequence[str]] = SKILL_ALIASES,
+        one_way_aliases: Iterable[str] = ONE_WAY_ALIASES,
+        fuzzy_threshold: float = 0.88,
+        min_fuzzy_length: int = 5,
+        context_chars: int = 60,
+    ):
+        self.text = text
+        self.fuzzy_threshold = fuzzy_threshold
+        self.min_fuzzy_length = min_fuzzy_length
+        self.context_chars = context_chars
+
+        # Normalized tokens with their character spans in the original text,
+        # so matches can be mapped back to a context snippet
+        self._tokens = [(normalize(match.group()), match.span()) for match in TOKEN_PATTERN.finditer(text)]
+        self._token_set = {token for token, _ in self._tokens}
+
+        self._alias_groups: Dict[str, Tuple[str, ...]] = {}
+        for group in aliases:
+            for name in group:
+                self._alias_groups[" ".join(tokenize(name))] = tuple(group)
+        self._one_way = {" ".join(tokenize(alias)) for alias in one_way_aliases}
+
+    def candidates(self, skill: str) -> List[Tuple[str, str]]:
+        """(phrase, method) pairs to look for: the skill itself, then its aliases.
+
+        One-way aliases are left out unless the skill is written that way.
+        """
+        key = " ".join(tokenize(skill))
+        phrases = [(key, "exact")]
+        for alias in self._alias_groups.get(key, ()):
+            alias_key = " ".join(tokenize(alias))
+            if alias_key != key and alias_key not in self._one_way:
+                phrases.append((alias_key, "alias"))
+        return phrases
+
+    def match(self, skill: str) -> SkillMatch:
+        parts = [part for part in COMPOUND_SEPARATORS.split(skill) if part.strip()]
+        if len(parts) > 1 and " ".join(tokenize(skill)) not in self._alias_groups:
+            # A compound target counts as present when any of its parts is
+            for part in parts:
+                part_match = self.match(part)
+                if part_match.found:
+                    part_match.skill = skill
+                    return part_match
+            return SkillMatch(skill=skill, found=False)
+
+        phrases = self.candidates(skill)
+        for phrase, method in phrases:
+            span = self._find_exact(phrase.split())
+            if span is not None:
+                return SkillMatch(skill, True, method, phrase, self._context(span))
+
+        for phrase, method in phrases:
+            span = self._find_fuzzy(phrase)
+            if span is not None:
+                return SkillMatch(skill, True, "fuzzy", phrase, self._context(span))
+
+        return SkillMatch(skill=skill, found=False)
+
+    def _find_exact(self, phrase_tokens: List[str]) -> Optional[Tuple[int, int]]:
+        if not phrase_tokens or phrase_tokens[0] not in self._token_set:
+            return None
+        size = len(phrase_tokens)
+        for index in range(len(self._tokens) - size + 1):
+            if all(self._tokens[index + offset][0] == phrase_tokens[offset] for offset in range(size)):
+                return self._tokens[index][1][0], self._tokens[index + size - 1][1][1]
+        return None
+
+    def _find_fuzzy(self, phrase: str) -> Optional[Tuple[int, int]]:
+        if len(phrase) < self.min_fuzzy_length:
+            return None
+        size = len(phrase.split())
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(phrase)
+        for index in range(len(self._tokens) - size + 1):
+            window = " ".join(token for token, _ in self._tokens[index:index + size])
+            # Cheap filters first: typos rarely touch the first character
+            if window[0] != phrase[0] or abs(len(window) - len(phrase)) > len(phrase) * 0.3:
+                continue
+            matcher.set_seq1(window)
+            if (
+                matcher.real_quick_ratio() >= self.fuzzy_threshold
+                and matcher.quick_ratio() >= self.fuzzy_threshold
+                and matcher.ratio() >= self.fuzzy_threshold
+            ):
+                return self._tokens[index][1][0], self._tokens[index + size - 1][1][1]
+        return None
+
+    def _context(self, span: Tuple[int, int]) -> str:
+        start = max(0, span[0] - self.context_chars)
+        end = min(len(self.text), span[1] + self.context_chars)
+        snippet = " ".join(self.text[start:end].split())
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(self.text) else ""
+        return f"{prefix}{snippet}{suffix}"
+
+
+def compute_skill_score(
+    required_found: int,
+    required_total: int,
+    preferred_found: int,
+    preferred_total: int,
+) -> float:
+    """Skill score on the 0.0 - 4.0 scale.
+
+    Required skills earn 2 points per match and lose 3 per miss, preferred
+    skills earn 1 point per match; the total is scaled by the maximum possible
+    points and clamped to the scale.
+    """
+    max_points = REQUIRED_MATCH_POINTS * required_total + PREFERRED_MATCH_POINTS * preferred_total
+    if max_points == 0:
+        return 0.0
+    points = (
+        REQUIRED_MATCH_POINTS * required_found
+        + PREFERRED_MATCH_POINTS * preferred_found
+        - REQUIRED_MISS_PENALTY * (required_total - required_found)
+    )
+    return round(min(MAX_SKILL_SCORE, max(0.0, points / max_points * MAX_SKILL_SCORE)), 2)
+
+
+def match_skills(text: str, skills: Sequence[str], matcher: Optional[SkillMatcher] = None) -> List[SkillMatch]:
+    """Matches every skill against the text."""
+    matcher = matcher or SkillMatcher(text)
+    return [matcher.match(skill) for skill in skills]
+
+
+def is_preferred(skill: str, preferred_skills: Sequence[str]) -> bool:
+    """Whether a target skill is one of the job's preferred (not required) skills."""
+    key = " ".join(tokenize(skill))
+    return any(" ".join(tokenize(preferred)) == key for preferred in preferred_skills)
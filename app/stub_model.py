@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any, Dict, Optional
+
+from agents import Model, ModelProvider, ModelResponse, Usage
+from openai.types.responses import ResponseOutputMessage, ResponseOutputText
+
+# --- Stand-in model ---
+#
+# A local replacement for the OpenAI model behind every agent, for offline
+# benchmarks and development without an API key. It waits a configurable
+# latency and then answers with a JSON document that satisfies the agent's
+# output schema, so the whole pipeline runs exactly as it would against the
+# real API, minus the network and the judgement. The placeholders are seeded
+# from a hash of the prompt: the same prompt always gets the same answer, but
+# different resumes get different extractions, so downstream stages see
+# distinct inputs (and miss the checkpoint cache) just as with a real model.
+
+
+def fake_from_schema(
+    schema: Dict[str, Any],
+    defs: Optional[Dict[str, Any]] = None,
+    name: str = "value",
+    rng: Optional[random.Random] = None,
+) -> Any:
+    """Builds a placeholder instance of a JSON schema (as produced by pydantic).
+
+    With `rng`, strings and array lengths vary with it; without, the
+    placeholders are fixed.
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], defs, name, rng)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            return fake_from_schema(schema[combinator][0], defs, name, rng)
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            prop: fake_from_schema(prop_schema, defs, prop, rng)
+            for prop, prop_schema in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        length = rng.randint(1, 3) if rng is not None else 2
+        return [fake_from_schema(schema.get("items", {}), defs, f"{name} {index + 1}", rng) for index in range(length)]
+    if kind in ("number", "integer"):
+        value = schema.get("minimum", 1)
+        return int(value) if kind == "integer" else float(value)
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    if rng is not None:
+        return f"stub {name} {rng.getrandbits(32):08x}"
+    return f"stub {name}"
+
+
+def prompt_rng(prompt: str) -> random.Random:
+    """A random generator seeded from the prompt, so equal prompts get equal answers."""
+    return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+
+class StubModel(Model):
+    """Answers every request with schema-valid JSON after `latency` seconds (± `jitter`, a fraction)."""
+
+    def __init__(self, name: str, latency: float = 0.5, jitter: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+    ) -> ModelResponse:
+        delay = self.latency * (1 + random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(max(0.0, delay))
+
+        prompt = (system_instructions or "") + (input if isinstance(input, str) else json.dumps(input))
+        rng = prompt_rng(prompt)
+        if output_schema is None or output_schema.is_plain_text():
+            text = f"stub response from {self.name} {rng.getrandbits(32):08x}"
+        else:
+            text = json.dumps(fake_from_schema(output_schema.json_schema(), rng=rng))
+
+        message = ResponseOutputMessage(
+            id="stub",
+            type="message",
+            role="assistant",
+            status="completed",
+            content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+        )
+        return ModelResponse(
+            output=[message],
+            usage=Usage(requests=1, input_tokens=len(prompt) // 4 + 1, output_tokens=len(text) // 4 + 1),
+            response_id=None,
+        )
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError("The stub model does not stream")
+
+
+class StubModelProvider(ModelProvider):
+    """Resolves every model name to a StubModel.
+
+    `latency` is either one delay for all models or a mapping of model name
+    to delay, with `default_latency` for the names it does not list.
+    """
+
+    def __init__(self, latency=0.5, jitter: float = 0.0, default_latency: float = 0.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.default_latency = default_latency
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        if isinstance(self.latency, dict):
+            latency = self.latency.get(model_name, self.default_latency)
+        else:
+            latency = self.latency
+        return StubModel(model_name or "stub", latency, self.jitter)
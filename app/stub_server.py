@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from stub_model import fake_from_schema, prompt_rng
+
+# --- OpenAI-compatible stub server ---
+#
+# Serves /v1/chat/completions with schema-valid placeholder answers after a
+# configurable latency, for load tests of the API without spending tokens.
+# Point the scorer at it with LLM_BASE_URL:
+#
+#   uvicorn stub_server:app --app-dir app --port 9000
+#   LLM_BASE_URL=http://localhost:9000/v1 uvicorn main:app --app-dir app
+#
+# Only non-streaming chat completions with a json_schema response format (as
+# the agents send them) are supported.
+
+# Seconds per completion, and the jitter around it as a fraction
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.5"))
+STUB_LLM_JITTER = float(os.getenv("STUB_LLM_JITTER", "0.1"))
+# Fraction of requests answered with 429, to exercise rate-limit handling
+STUB_RATE_LIMIT_FRACTION = float(os.getenv("STUB_RATE_LIMIT_FRACTION", "0"))
+
+app = FastAPI(title="Stub LLM server")
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if body.get("stream"):
+        return JSONResponse(status_code=400, content={"error": {"message": "streaming is not supported"}})
+
+    if random.random() < STUB_RATE_LIMIT_FRACTION:
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": "1"},
+            content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}},
+        )
+
+    await asyncio.sleep(max(0.0, STUB_LLM_LATENCY * (1 + random.uniform(-STUB_LLM_JITTER, STUB_LLM_JITTER))))
+
+    # Seeded from the prompt, so different prompts get different answers
+    prompt = "".join(_message_text(message) for message in body.get("messages", []))
+    rng = prompt_rng(prompt)
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        content = json.dumps(fake_from_schema(response_format["json_schema"]["schema"], rng=rng))
+    else:
+        content = f"stub response {rng.getrandbits(32):08x}"
+
+    prompt_tokens = len(prompt) // 4 + 1
+    completion_tokens = len(content) // 4 + 1
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
@@ -0,0 +1,234 @@
+"""Offline benchmark of the scoring pipeline over the bundled test/ resumes.
+
+Every agent runs against the stand-in model from stub_model.py, so this needs
+neither network access nor an API key. It reports PDF parse time, per-stage
+latency, throughput at several concurrency levels and peak memory, which is
+enough to spot regressions in the pipeline's orchestration:
+
+    python app/tests/benchmark_pipeline.py --latency 0.5 --concurrency 1 4 16
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+sys.path.insert(0, APP_DIR)
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+import metrics
+import resume_scorer
+import text_extraction
+from resume_scorer import score_resume, use_model_provider
+from stub_model import StubModelProvider
+from text_extraction import extract_resume_text
+
+JOB_DESCRIPTION = """
+SALES OFFICER
+Kualifikasi:
+- Pendidikan minimal SMA/SMK, diutamakan D3/S1 semua jurusan
+- Pengalaman minimal 1 tahun sebagai sales, diutamakan di bidang perbankan atau pembiayaan
+- Memiliki kemampuan komunikasi dan negosiasi yang baik
+- Berorientasi pada target dan mampu bekerja dalam tim
+- Menguasai Microsoft Office, terutama Excel
+"""
+TARGET_SKILLS = ["Sales", "Negotiation", "Communication", "Customer Service", "Microsoft Excel"]
+
+
+def bundled_resumes() -> List[str]:
+    return sorted(glob.glob(os.path.join(REPO_DIR, "test", "**", "*.pdf"), recursive=True))
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean": round(statistics.mean(values), 4),
+        "p50": round(percentile(values, 0.5), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def measure_pdf_parsing(paths: List[str]) -> dict:
+    """Parses every PDF in-process, one at a time, with the production page/char limits."""
+    seconds = []
+    failures = 0
+    for path in paths:
+        with open(path, "rb") as file:
+            content = file.read()
+        start = time.perf_counter()
+        try:
+            extract_resume_text(
+                content, text_extraction.PDF_MAX_PAGES, text_extraction.PDF_MAX_CHARS
+            )
+        except Exception:
+            failures += 1
+            continue
+        seconds.append(time.perf_counter() - start)
+    return {**summarize(seconds), "failures": failures}
+
+
+async def run_level(resumes: List[bytes], concurrency: int) -> dict:
+    """Scores every resume with at most `concurrency` pipelines in flight."""
+    # Start each level cold, otherwise everything after the first level is a cache hit
+    resume_scorer.resume_cache.clear()
+    resume_scorer.job_cache.clear()
+    resume_scorer.checkpoint_cache.clear()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stage_seconds: Dict[str, List[float]] = {}
+    latencies = []
+    errors: List[str] = []
+
+    async def score_one(content: bytes) -> None:
+        async with semaphore:
+            try:
+                # Repeated resumes still hit the resume cache, but are scored
+                # again, unless an identical request is still in flight
+                result = await score_resume(content, JOB_DESCRIPTION, TARGET_SKILLS, refresh=True)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+        for stage, seconds in result["timings"].items():
+            if stage == "total":
+                latencies.append(seconds)
+            else:
+                stage_seconds.setdefault(stage, []).append(seconds)
+
+    # Stages resumed from a checkpoint took no model call; their timings
+    # would flatter the pipeline
+    checkpoint_hits = metrics.checkpoint_hits.total()
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(score_one(content) for content in resumes))
+    elapsed = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    failures = len(errors)
+    return {
+        "concurrency": concurrency,
+        "resumes": len(resumes),
+        "failures": failures,
+        "errors": sorted(set(errors)),
+        "wall_seconds": round(elapsed, 3),
+        "throughput_per_second": round((len(resumes) - failures) / elapsed, 3),
+        "latency": summarize(latencies) if latencies else None,
+        "stages": {stage: summarize(values) for stage, values in sorted(stage_seconds.items())},
+        "peak_python_heap_mb": round(peak_bytes / 1024 / 1024, 2),
+        "checkpoint_hits": int(metrics.checkpoint_hits.total() - checkpoint_hits),
+    }
+
+
+def run_benchmark(
+    latency: float = 0.5,
+    jitter: float = 0.1,
+    concurrency_levels: List[int] = (1, 4, 16),
+    repeats: int = 1,
+    max_in_flight: Optional[int] = None,
+    verbose: bool = False,
+) -> dict:
+    paths = bundled_resumes()
+    resumes = []
+    for path in paths:
+        with open(path, "rb") as file:
+            resumes.append(file.read())
+    resumes = resumes * repeats
+
+    use_model_provider(StubModelProvider(latency=latency, jitter=jitter))
+    if max_in_flight is not None:
+        resume_scorer.llm_scheduler.max_in_flight = max_in_flight
+
+    report = {
+        "model_latency": latency,
+        "llm_max_in_flight": resume_scorer.llm_scheduler.max_in_flight,
+        "pdf_parsing": measure_pdf_parsing(paths),
+        "levels": [],
+    }
+    # The pipeline prints every agent result; keep the report readable
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output:
+            for concurrency in concurrency_levels:
+                report["levels"].append(asyncio.run(run_level(resumes, concurrency)))
+    finally:
+        use_model_provider(None)
+        text_extraction.shutdown_pool()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KiB on Linux; the children are the PDF worker processes
+    report["peak_rss_mb"] = round(usage.ru_maxrss / 1024, 1)
+    report["peak_pdf_worker_rss_mb"] = round(children.ru_maxrss / 1024, 1)
+    return report
+
+
+def print_report(report: dict) -> None:
+    parsing = report["pdf_parsing"]
+    print(f"PDF parsing: {parsing['count']} files, mean {parsing['mean'] * 1000:.1f} ms, "
+          f"p95 {parsing['p95'] * 1000:.1f} ms, max {parsing['max'] * 1000:.1f} ms, "
+          f"{parsing['failures']} unreadable")
+    print(f"Stub model latency {report['model_latency']}s, "
+          f"LLM_MAX_IN_FLIGHT {report['llm_max_in_flight']}")
+    print()
+    print(f"{'concurrency':>11} {'resumes/s':>10} {'p50 s':>8} {'p95 s':>8} {'heap MB':>8} {'failed':>7}")
+    for level in report["levels"]:
+        latency = level["latency"] or {"p50": 0.0, "p95": 0.0}
+        print(f"{level['concurrency']:>11} {level['throughput_per_second']:>10.2f} "
+              f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+              f"{level['peak_python_heap_mb']:>8.1f} {level['failures']:>7}")
+        for error in level["errors"]:
+            print(f"{'':>11} failed: {error[:120]}")
+    for level in report["levels"]:
+        print(f"\nPer-stage latency at concurrency {level['concurrency']} (seconds):")
+        for stage, stats in level["stages"].items():
+            print(f"  {stage:<20} mean {stats['mean']:>7.3f}  p50 {stats['p50']:>7.3f}  p95 {stats['p95']:>7.3f}")
+    print(f"\nPeak RSS: {report['peak_rss_mb']} MB (PDF workers: {report['peak_pdf_worker_rss_mb']} MB)")
+
+
+def test_benchmark_runs_offline():
+    report = run_benchmark(latency=0.05, jitter=0.0, concurrency_levels=[1, 4])
+    print_report(report)
+
+    parsed = report["pdf_parsing"]["count"]
+    for level in report["levels"]:
+        # Only the resumes PyPDF2 cannot read at all may fail
+        assert level["resumes"] - level["failures"] == parsed
+        assert "evaluation" in level["stages"]
+        # Every stage timing is a real (stub) model call
+        assert level["checkpoint_hits"] == 0
+    # Scoring several resumes at once must beat scoring them one by one
+    assert report["levels"][1]["throughput_per_second"] > report["levels"][0]["throughput_per_second"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub model latency per call, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency jitter, as a fraction of --latency")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeats", type=int, default=1, help="score every bundled resume this many times per level")
+    parser.add_argument("--max-in-flight", type=int, help="override LLM_MAX_IN_FLIGHT")
+    parser.add_argument("--json", help="also write the report to this file, for comparing runs")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's own output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.latency, args.jitter, args.concurrency, args.repeats, args.max_in_flight, args.verbose)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+from typing import Callable, Iterator
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+sys.path.insert(0, APP_DIR)
+
+# The tests never call a real model. Set before any test module imports
+# resume_scorer, which reads the backend once at import
+os.environ["LLM_BACKEND"] = "stub"
+
+
+def bundled_resume_paths():
+    return sorted(glob.glob(os.path.join(REPO_DIR, "test", "**", "*.pdf"), recursive=True))
+
+
+@pytest.fixture
+def bundled_resume() -> bytes:
+    """The first PDF resume under test/."""
+    with open(bundled_resume_paths()[0], "rb") as file:
+        return file.read()
+
+
+@pytest.fixture
+def stub_pipeline() -> Iterator[Callable[..., None]]:
+    """Call with a latency to run every agent against the stub model, with empty caches.
+
+    The caches are emptied again and the agents' own backends restored afterwards.
+    """
+    import resume_scorer
+    from stub_model import StubModelProvider
+
+    caches = (resume_scorer.resume_cache, resume_scorer.job_cache, resume_scorer.checkpoint_cache, resume_scorer.result_cache)
+
+    def start(latency: float = 0.0) -> None:
+        for cache in caches:
+            cache.clear()
+        resume_scorer.use_model_provider(StubModelProvider(latency=latency))
+
+    yield start
+    resume_scorer.use_model_provider(None)
+    for cache in caches:
+        cache.clear()
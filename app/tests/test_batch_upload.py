@@ -0,0 +1,55 @@
+import io
+import zipfile
+
+import pytest
+
+import endpoint
+from endpoint import expand_zip_upload
+from fastapi import HTTPException
+
+RESUME = b"Sales Officer, 3 tahun pengalaman penjualan\n"
+
+
+def make_zip(members: dict, compression: int = zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def rejected(content: bytes, *args) -> str:
+    with pytest.raises(HTTPException) as error:
+        expand_zip_upload("resumes.zip", content, *args)
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+def test_resumes_are_unpacked():
+    content = make_zip({"a.pdf": RESUME, "b.txt": RESUME, "notes.docx": RESUME, "__MACOSX/._a.pdf": RESUME})
+    assert expand_zip_upload("resumes.zip", content) == [("a.pdf", RESUME), ("b.txt", RESUME)]
+
+
+def test_limits_are_checked_before_decompressing(monkeypatch):
+    reads = []
+    original_read = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, *args: reads.append(args) or original_read(self, *args))
+
+    # Too many entries, counting what the batch already holds
+    many = make_zip({f"{index}.txt": RESUME for index in range(endpoint.MAX_BATCH_FILES - 1)})
+    assert "Too many resumes" in rejected(many, 2)
+
+    # A small archive of highly compressible members
+    monkeypatch.setattr(endpoint, "MAX_BATCH_BYTES", 5 * 1024 * 1024)
+    bomb = make_zip({f"{index}.txt": b"0" * (1024 * 1024) for index in range(6)})
+    assert len(bomb) < 64 * 1024
+    assert "Batch too large" in rejected(bomb)
+
+    assert reads == []
+
+
+def test_corrupt_member_is_a_bad_request():
+    content = bytearray(make_zip({"a.txt": RESUME}, zipfile.ZIP_STORED))
+    offset = bytes(content).index(RESUME)
+    content[offset] ^= 0xFF
+    assert "a.txt is unreadable" in rejected(bytes(content))
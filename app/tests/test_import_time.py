@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds `import main` may take in a fresh interpreter; FastAPI alone is most of it
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+# Loaded by the lifespan warm-up or the first request, never at import
+DEFERRED_MODULES = ("agents", "openai")
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def measure_import() -> dict:
+    """Imports the app in a fresh interpreter, as a starting uvicorn worker does."""
+    completed = subprocess.run(
+        [sys.executable, "-c", MEASURE],
+        cwd=APP_DIR,
+        env={**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "test")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_is_fast():
+    # Best of three, so a busy machine does not fail the build
+    runs = [measure_import() for _ in range(3)]
+    fastest = min(run["seconds"] for run in runs)
+    print(f"import main: {fastest:.3f}s (budget {IMPORT_BUDGET_SECONDS}s)")
+
+    assert runs[0]["loaded"] == [], f"imported at startup: {runs[0]['loaded']}"
+    assert fastest < IMPORT_BUDGET_SECONDS
+
+
+if __name__ == "__main__":
+    test_app_import_is_fast()
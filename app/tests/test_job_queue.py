@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from job_queue import SUCCEEDED, JobQueue, SQLiteJobStore
+
+
+class CountingStore(SQLiteJobStore):
+    """Counts the housekeeping calls made against the store."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.purges = 0
+
+    def purge(self, older_than: float) -> int:
+        self.purges += 1
+        return super().purge(older_than)
+
+
+async def echo(payload: dict, resume: bytes) -> dict:
+    return {"resume": resume.decode()}
+
+
+def test_sqlite_queue_does_not_block_the_event_loop():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    store = CountingStore(path)
+    queue = JobQueue(store, echo, workers=2, poll_interval=0.05, maintenance_interval=10)
+
+    async def main():
+        await queue.start()
+        # Another process holds the write lock while jobs are submitted
+        other_worker = sqlite3.connect(path, isolation_level=None)
+        other_worker.execute("BEGIN IMMEDIATE")
+        asyncio.get_running_loop().call_later(0.3, other_worker.execute, "COMMIT")
+
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        ticking = asyncio.create_task(ticker())
+        job_ids = await asyncio.gather(*(queue.submit({}, f"resume {index}".encode()) for index in range(3)))
+        for _ in range(100):
+            jobs = [await queue.get(job_id) for job_id in job_ids]
+            if all(job["status"] == SUCCEEDED for job in jobs):
+                break
+            await asyncio.sleep(0.02)
+        ticking.cancel()
+        await queue.stop()
+        return jobs, max(b - a for a, b in zip(ticks, ticks[1:]))
+
+    jobs, longest_gap = asyncio.run(main())
+    assert [job["result"]["resume"] for job in jobs] == ["resume 0", "resume 1", "resume 2"]
+    assert longest_gap < 0.2, longest_gap
+    # Idle polls do not purge; that waits for the maintenance interval
+    assert store.purges == 0
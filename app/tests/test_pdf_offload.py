@@ -0,0 +1,119 @@
+import asyncio
+import glob
+import os
+import tempfile
+import time
+
+import text_extraction
+from PyPDF2 import PdfReader, PdfWriter
+from text_extraction import extract_resume_text, extract_resume_text_async
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+
+
+def build_large_pdf(copies: int = 2) -> str:
+    """Concatenates every bundled test resume `copies` times into one big PDF."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "test", "**", "*.pdf"), recursive=True)):
+        try:
+            pages.extend(PdfReader(path).pages)
+        except Exception:
+            # Some bundled CVs are damaged beyond what PyPDF2 can read
+            continue
+
+    writer = PdfWriter()
+    for _ in range(copies):
+        for page in pages:
+            writer.add_page(page)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        writer.write(temp_file)
+        return temp_file.name
+
+
+async def measure_loop_lag(extract, pdf_path: str, parses: int = 2, interval: float = 0.01) -> dict:
+    """Runs `parses` concurrent extractions while a ticker measures event-loop lag.
+
+    The ticker stands in for the other in-flight requests: the worse the lag,
+    the longer every other request waits for the event loop.
+    """
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    async def parse():
+        await extract(pdf_path)
+
+    ticker_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(parse() for _ in range(parses)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+
+    return {
+        "parse_seconds": round(elapsed, 3),
+        "max_lag_ms": round(max(lags, default=0.0) * 1000, 1),
+        "avg_lag_ms": round(sum(lags) / len(lags) * 1000, 1) if lags else 0.0,
+    }
+
+
+async def extract_on_loop(pdf_path: str) -> str:
+    """The old behaviour: a synchronous parse on the event loop thread."""
+    return extract_resume_text(pdf_path, max_pages=None)
+
+
+async def extract_in_pool(pdf_path: str) -> str:
+    return await extract_resume_text_async(pdf_path, timeout=300, max_pages=None)
+
+
+def test_pdf_offload_keeps_event_loop_responsive():
+    pdf_path = build_large_pdf()
+    try:
+        # Warm the workers up so their start-up isn't counted
+        asyncio.run(extract_in_pool(pdf_path))
+
+        on_loop = asyncio.run(measure_loop_lag(extract_on_loop, pdf_path))
+        in_pool = asyncio.run(measure_loop_lag(extract_in_pool, pdf_path))
+
+        print(f"on event loop: {on_loop}")
+        print(f"worker process: {in_pool}")
+
+        # With the parse on the loop the ticker is starved for a whole parse;
+        # with the pool it should keep ticking close to its interval
+        assert in_pool["max_lag_ms"] < on_loop["max_lag_ms"]
+        assert in_pool["max_lag_ms"] < 100
+    finally:
+        text_extraction.shutdown_pool()
+        os.unlink(pdf_path)
+
+
+def test_timeout_only_fails_its_own_file():
+    large_pdf = build_large_pdf(copies=4)
+    small_pdf = sorted(glob.glob(os.path.join(REPO_DIR, "test", "**", "*.pdf"), recursive=True))[0]
+    workers = text_extraction.PDF_WORKERS
+    # One worker: the small file waits for the one that times out
+    text_extraction.PDF_WORKERS = 1
+    text_extraction.shutdown_pool()
+
+    async def parse_both():
+        return await asyncio.gather(
+            extract_resume_text_async(large_pdf, timeout=0.3, max_pages=None),
+            extract_resume_text_async(small_pdf, timeout=30),
+            return_exceptions=True,
+        )
+
+    try:
+        timed_out, parsed = asyncio.run(parse_both())
+        assert isinstance(timed_out, TimeoutError), timed_out
+        assert isinstance(parsed, str) and parsed.strip(), parsed
+    finally:
+        text_extraction.shutdown_pool()
+        text_extraction.PDF_WORKERS = workers
+        os.unlink(large_pdf)
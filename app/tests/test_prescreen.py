@@ -0,0 +1,92 @@
+import glob
+import os
+
+import text_extraction
+from prescreen import screen
+from text_extraction import extract_resume_text
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(APP_DIR)
+
+JOB_DESCRIPTION = """
+SALES OFFICER
+Kualifikasi:
+- Pendidikan minimal SMA/SMK, diutamakan D3/S1 semua jurusan
+- Pengalaman minimal 1 tahun sebagai sales, diutamakan di bidang perbankan atau pembiayaan
+- Memiliki kemampuan komunikasi dan negosiasi yang baik
+- Berorientasi pada target dan mampu bekerja dalam tim
+- Menguasai Microsoft Office, terutama Excel
+"""
+TARGET_SKILLS = ["Sales", "Negotiation", "Communication", "Customer Service", "Microsoft Excel"]
+
+ENGLISH_JOB_DESCRIPTION = """
+Sales Officer
+Requirements:
+- At least a high school diploma, bachelor's degree preferred
+- Minimum 1 year of experience in sales, preferably in banking or financing
+- Strong communication and negotiation skills
+- Target oriented and able to work in a team
+"""
+
+FOOTBALL_COACH = """
+CURRICULUM VITAE
+Budi Santoso, Pelatih Sepak Bola Berlisensi AFC C
+
+Pengalaman Kerja
+2018 - sekarang  Pelatih Kepala, SSB Garuda Muda, Bandung
+- Melatih tim U-15 dan U-17 dalam taktik, teknik dasar dan kebugaran fisik
+- Menyusun program latihan mingguan dan jadwal pertandingan liga pelajar
+- Membawa tim juara Piala Walikota 2019 dan 2021
+2014 - 2018  Asisten Pelatih, Persib Academy
+- Memimpin sesi pemanasan, latihan penjaga gawang dan analisis video pertandingan
+- Memantau cedera pemain bersama fisioterapis klub
+
+Pendidikan
+S1 Pendidikan Jasmani, Kesehatan dan Rekreasi, Universitas Pendidikan Indonesia, 2013
+
+Sertifikasi
+Lisensi Kepelatihan AFC C (2016), Lisensi PSSI D (2014), Pertolongan Pertama Olahraga
+
+Keahlian
+Taktik sepak bola, analisis video, kebugaran atlet, manajemen tim usia muda, pembinaan pemain
+"""
+
+
+def bundled_resume_texts():
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "test", "**", "*.pdf"), recursive=True)):
+        with open(path, "rb") as file:
+            try:
+                yield path, extract_resume_text(
+                    file.read(), text_extraction.PDF_MAX_PAGES, text_extraction.PDF_MAX_CHARS
+                )
+            except Exception:
+                continue  # unreadable PDFs never reach the pre-screen
+
+
+def test_off_target_resume_is_short_circuited():
+    screening = screen(FOOTBALL_COACH, JOB_DESCRIPTION, TARGET_SKILLS)
+    print(screening)
+    assert screening.short_circuit
+    assert screening.skills_found == []
+    assert "sales" in screening.missing_terms
+
+
+def test_sales_resumes_pass():
+    for path, text in bundled_resume_texts():
+        screening = screen(text, JOB_DESCRIPTION, TARGET_SKILLS)
+        print(f"{os.path.basename(path)}: relevance {screening.relevance}")
+        assert not screening.short_circuit, path
+
+
+def test_no_target_skills_is_never_rejected():
+    # Keyword overlap alone is lexical: an Indonesian sales resume shares few
+    # words with an English sales posting
+    for path, text in bundled_resume_texts():
+        screening = screen(text, ENGLISH_JOB_DESCRIPTION, None)
+        print(f"{os.path.basename(path)}: relevance {screening.relevance}")
+        assert not screening.short_circuit, path
+    assert not screen(FOOTBALL_COACH, JOB_DESCRIPTION, []).short_circuit
+
+
+def test_short_text_is_never_rejected():
+    assert not screen("Pelatih sepak bola", JOB_DESCRIPTION, TARGET_SKILLS).short_circuit
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+import openai  # noqa: F401  (imported by LLMScheduler.run; keep its import out of the timings)
+from cache import SQLiteCache
+from rate_budget import SQLiteRateBudget
+from resume_scorer import LLMScheduler
+
+
+class FakeRunResult:
+    raw_responses = []
+
+
+async def fake_call() -> FakeRunResult:
+    return FakeRunResult()
+
+
+async def longest_stall(work, seconds: float = 0.05) -> float:
+    """Runs `work` while a ticker measures the longest gap between its ticks."""
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(seconds)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await work
+    finally:
+        task.cancel()
+    return max(b - a for a, b in zip(ticks, ticks[1:])) - seconds
+
+
+def test_shared_budget_does_not_block_the_event_loop():
+    path = os.path.join(tempfile.mkdtemp(), "llm_budget.sqlite3")
+    scheduler = LLMScheduler(max_in_flight=4, tokens_per_minute=100000, budget=SQLiteRateBudget(100000, path))
+
+    async def main():
+        # Another worker holds the budget's write lock for a while
+        other_worker = sqlite3.connect(path, isolation_level=None)
+        other_worker.execute("BEGIN IMMEDIATE")
+        asyncio.get_running_loop().call_later(0.3, other_worker.execute, "COMMIT")
+        calls = asyncio.gather(*(scheduler.run(fake_call, 100, "evaluation") for _ in range(10)))
+        return await longest_stall(calls), calls.result()
+
+    stall, results = asyncio.run(main())
+    assert len(results) == 10
+    assert stall < 0.2, stall
+
+
+def test_sqlite_cache_async_calls():
+    cache = SQLiteCache(os.path.join(tempfile.mkdtemp(), "test.sqlite3"))
+
+    async def main():
+        await cache.set_async("key", {"value": 1})
+        assert await cache.get_async("key") == {"value": 1}
+        await cache.delete_async("key")
+        assert await cache.get_async("key") is None
+
+    asyncio.run(main())
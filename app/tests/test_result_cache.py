@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+import resume_scorer
+from resume_scorer import (
+    invalidate_results,
+    job_cache_key,
+    result_cache,
+    result_cache_key,
+    resume_cache_key,
+    score_resume,
+)
+
+RESUME_HASH = "a" * 64
+JOB_DESCRIPTION = "SALES OFFICER\nPengalaman minimal 1 tahun sebagai sales"
+MODEL_STAGES = {"job_analysis", "resume_extraction", "experience_scoring", "education_scoring", "evaluation"}
+
+
+def test_key_ignores_formatting():
+    key = result_cache_key(RESUME_HASH, JOB_DESCRIPTION, ["Sales", "Negotiation"])
+    assert key == result_cache_key(RESUME_HASH, f"  {JOB_DESCRIPTION.replace(chr(10), '   ')} ", ["negotiation", "SALES"])
+    assert key == result_cache_key(RESUME_HASH, JOB_DESCRIPTION, ["Sales, Negotiation"])
+
+
+def test_key_covers_every_input():
+    key = result_cache_key(RESUME_HASH, JOB_DESCRIPTION, ["Sales"])
+    assert key != result_cache_key("b" * 64, JOB_DESCRIPTION, ["Sales"])
+    assert key != result_cache_key(RESUME_HASH, JOB_DESCRIPTION + " perbankan", ["Sales"])
+    assert key != result_cache_key(RESUME_HASH, JOB_DESCRIPTION, ["Sales", "Excel"])
+    assert key != result_cache_key(RESUME_HASH, JOB_DESCRIPTION, None)
+
+
+def with_model(agent_key: str, model: str, key):
+    """`key()` computed with MODEL_<agent_key> set to `model`."""
+    variable = f"MODEL_{agent_key}"
+    previous = os.environ.get(variable)
+    os.environ[variable] = model
+    resume_scorer._agent_fingerprints.clear()
+    try:
+        return key()
+    finally:
+        if previous is None:
+            del os.environ[variable]
+        else:
+            os.environ[variable] = previous
+        resume_scorer._agent_fingerprints.clear()
+
+
+def test_resume_cache_key_covers_the_extractor_model():
+    key = lambda: resume_cache_key(RESUME_HASH)
+    assert with_model("RESUME_EXTRACTOR", "model-a", key) == with_model("RESUME_EXTRACTOR", "model-a", key)
+    assert with_model("RESUME_EXTRACTOR", "model-a", key) != with_model("RESUME_EXTRACTOR", "model-b", key)
+    assert with_model("JOB_ANALYZER", "model-a", key) == with_model("JOB_ANALYZER", "model-b", key)
+
+
+def test_job_cache_key_covers_the_analyzer_model():
+    key = lambda: job_cache_key("b" * 64)
+    assert with_model("JOB_ANALYZER", "model-a", key) != with_model("JOB_ANALYZER", "model-b", key)
+    assert with_model("RESUME_EXTRACTOR", "model-a", key) == with_model("RESUME_EXTRACTOR", "model-b", key)
+
+
+def test_invalidation():
+    result_cache.clear()
+    keys = [result_cache_key(RESUME_HASH, JOB_DESCRIPTION, [skill]) for skill in ("Sales", "Excel")]
+    for key in keys:
+        result_cache.set(key, {"cached_at": 0, "result": {}})
+
+    assert invalidate_results(keys[0]) == 1
+    assert invalidate_results(keys[0]) == 0
+    assert result_cache.get(keys[1]) is not None
+    assert invalidate_results() == 1
+    assert len(result_cache) == 0
+
+
+def test_refresh_and_invalidation_call_the_model(stub_pipeline, bundled_resume):
+    stub_pipeline(latency=0)
+
+    def score(refresh: bool = False) -> dict:
+        return asyncio.run(score_resume(bundled_resume, JOB_DESCRIPTION, ["Sales"], refresh=refresh))
+
+    first = score()
+    assert set(first["usage"]) == MODEL_STAGES
+    assert score()["cache"]["hit"]
+
+    # A refresh runs every model stage again rather than reading checkpoints
+    refreshed = score(refresh=True)
+    assert not refreshed["cache"]["hit"]
+    assert set(refreshed["usage"]) == MODEL_STAGES
+
+    # Invalidation drops the result's checkpoints; the resume and posting stay cached
+    assert invalidate_results(refreshed["cache"]["key"]) == 1
+    rescored = score()
+    assert not rescored["cache"]["hit"]
+    assert set(rescored["usage"]) == {"experience_scoring", "education_scoring", "evaluation"}
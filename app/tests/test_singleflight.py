@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from resume_scorer import DeadlineExceeded, deadline_in, score_resume
+from singleflight import SingleFlight, WaitTimeout, current_flight
+
+JOB_DESCRIPTION = "SALES OFFICER\nPengalaman minimal 1 tahun sebagai sales"
+
+
+async def slow_work(calls: list, seconds: float = 0.3) -> str:
+    """Stands in for a pipeline: fails if its (shared) deadline passes while it works."""
+    calls.append(1)
+    await asyncio.sleep(seconds)
+    deadline = current_flight.get().deadline
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("deadline passed")
+    return "done"
+
+
+def test_concurrent_callers_share_one_call():
+    flights, calls = SingleFlight("test"), []
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", lambda: slow_work(calls, 0.05)) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["done"] * 5
+    assert len(calls) == 1
+    assert flights.in_flight() == 0
+
+
+def test_each_caller_keeps_its_own_deadline():
+    flights, calls = SingleFlight("test"), []
+
+    async def main():
+        return await asyncio.gather(
+            flights.do("key", lambda: slow_work(calls), deadline_in(0.1)),
+            flights.do("key", lambda: slow_work(calls)),
+            return_exceptions=True,
+        )
+
+    impatient, patient = asyncio.run(main())
+    assert isinstance(impatient, WaitTimeout)
+    assert patient == "done"
+    assert len(calls) == 1
+
+
+def test_call_is_cancelled_once_every_caller_left():
+    flights, calls = SingleFlight("test"), []
+
+    async def main():
+        waiters = [asyncio.create_task(flights.do("key", lambda: slow_work(calls))) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        task = flights._flights["key"].task
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert not task.cancelled()
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return task
+
+    assert asyncio.run(main()).cancelled()
+    assert flights.in_flight() == 0
+
+
+def test_joined_pipeline_outlives_a_short_deadline(stub_pipeline, bundled_resume):
+    stub_pipeline(latency=0.2)
+
+    async def main():
+        return await asyncio.gather(
+            score_resume(bundled_resume, JOB_DESCRIPTION, ["Sales"], deadline=deadline_in(0.5)),
+            score_resume(bundled_resume, JOB_DESCRIPTION, ["Sales"]),
+            return_exceptions=True,
+        )
+
+    impatient, patient = asyncio.run(main())
+    assert isinstance(impatient, DeadlineExceeded), impatient
+    assert isinstance(patient, dict), patient
+    assert patient["degraded"] == []
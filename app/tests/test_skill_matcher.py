@@ -0,0 +1,74 @@
+from skill_matcher import SkillMatcher, compute_skill_score, is_preferred, match_skills, parse_skills
+
+RESUME = """
+Pengalaman Kerja
+2019 - 2023  Sales Executive, PT Maju Jaya
+- Negosiasi harga dengan distributor dan menjaga pelayanan pelanggan
+- Membuat laporan penjualan mingguan dengan MS Excel
+Keahlian: Python3, NodeJS, Kepemimpinan, Komunikasi
+"""
+
+
+def found(text: str, skill: str) -> bool:
+    return SkillMatcher(text).match(skill).found
+
+
+def test_exact_alias_and_fuzzy_matches():
+    matches = {match.skill: match for match in match_skills(RESUME, ["Sales", "Excel", "Python", "Node.js", "Negotiation"])}
+    assert matches["Sales"].method == "exact"
+    assert matches["Excel"].method == "exact"
+    assert matches["Python"].method == "alias" and matches["Python"].matched_term == "python3"
+    assert matches["Node.js"].method == "alias" and matches["Node.js"].matched_term == "nodejs"
+    assert matches["Negotiation"].method == "alias"
+    assert "distributor" in matches["Negotiation"].context
+
+    assert SkillMatcher("Berpengalaman dalam negotiaton kontrak").match("Negotiation").method == "fuzzy"
+    assert not found(RESUME, "Kubernetes")
+
+
+def test_compound_skills_match_any_part():
+    assert found(RESUME, "Sales & Lead Generation")
+    assert found(RESUME, "Marketing dan Customer Service")
+    assert not found(RESUME, "Marketing / Cold Calling")
+
+
+def test_short_aliases_are_one_way():
+    # Not the skill these aliases abbreviate
+    assert not found("Botol air 600 ML (mililiter), stok gudang", "Machine Learning")
+    assert not found("Koordinator Node pengiriman wilayah Jawa Barat", "Node.js")
+    assert not found("Lulus TS: 2019, nilai rata-rata 85", "TypeScript")
+    assert not found("Leader shift gudang", "Leadership")
+
+    # A target written as the short alias still finds the full name, and itself
+    assert found("Membangun model Machine Learning untuk prediksi churn", "ML")
+    assert found("Frontend dengan TypeScript dan React", "TS")
+    assert found("Pipeline ML untuk klasifikasi", "ML")
+    assert found("Memimpin tim sebagai Team Leader", "Leadership")
+
+
+def test_sibling_products_are_not_aliases():
+    assert not found("Database: MySQL, SQL Server", "PostgreSQL")
+    assert not found("Repo di Bitbucket dan GitLab", "GitHub")
+    assert not found("Mengelola pipeline di CRM perusahaan", "Salesforce")
+    assert not found("Pengalaman cold calling ke calon nasabah", "Telemarketing")
+    assert not found("Posisi terakhir: Sales Officer", "Sales Executive")
+
+    # True synonyms still match
+    assert found("Database: Postgres 14", "PostgreSQL")
+    assert found("Menulis query T-SQL", "SQL")
+    assert found("Pengalaman telesales kartu kredit", "Telemarketing")
+    assert found("Posisi terakhir: Sales Officer", "Penjualan")
+
+
+def test_parse_skills():
+    assert parse_skills(["Sales, Negotiation", "sales;Excel\nCRM", "", None]) == ["Sales", "Negotiation", "Excel", "CRM"]
+    assert parse_skills(None) == []
+
+
+def test_skill_score():
+    assert compute_skill_score(2, 2, 1, 1) == 4.0
+    assert compute_skill_score(0, 2, 1, 1) == 0.0
+    assert compute_skill_score(1, 2, 1, 1) == 0.0
+    assert compute_skill_score(2, 2, 0, 2) == 2.67
+    assert compute_skill_score(0, 0, 0, 0) == 0.0
+    assert is_preferred("microsoft  excel", ["Microsoft Excel"])
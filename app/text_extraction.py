@@ -0,0 +1,302 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, Optional, Set, Union
+from PyPDF2 import PdfReader
+
+# --- Resume text extraction ---
+#
+# The resume is parsed exactly once per request, up front, and the resulting
+# text is handed to every agent that needs it. Uploads are handled in memory:
+# PDFs are parsed from a BytesIO and text files decoded directly, a file path
+# is only accepted for callers that still have the resume on disk. PDF parsing is CPU-bound, so it
+# runs in worker processes to keep the event loop free for other requests.
+
+PDF_EXTENSIONS = (".pdf",)
+# The PDF header must appear within the first 1024 bytes of the file
+PDF_MAGIC = b"%PDF-"
+
+# A resume is given as raw bytes, a binary file object, or (legacy) a path
+ResumeSource = Union[bytes, bytearray, memoryview, BinaryIO, str]
+
+# Worker processes for PDF parsing; 0 splits the CPUs between the web workers
+# (WEB_CONCURRENCY), so N web workers do not start N pools of one per CPU each
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or max(
+    1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+)
+# Seconds a single PDF may take before its worker is killed
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "30"))
+# Pages read from a PDF; resumes rarely need more, attached portfolios do
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+# Characters kept from a PDF; extraction stops once the budget is reached
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "30000"))
+
+
+def has_text_layer(page) -> bool:
+    """Whether a page can contain extractable text.
+
+    Scanned pages only draw images: without a font on the page or a form
+    XObject (which may carry its own fonts) there is no text to extract, and
+    extract_text() would only waste time walking the content stream.
+    """
+    resources = page.get("/Resources")
+    if resources is None:
+        return True
+    resources = resources.get_object()
+    if "/Font" in resources:
+        return True
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        return False
+    xobjects = xobjects.get_object()
+    return any(xobjects[name].get_object().get("/Subtype") == "/Form" for name in xobjects)
+
+
+def iter_pdf_pages(pdf: Union[str, BinaryIO], max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yields the text of each page, skipping image-only pages."""
+    reader = PdfReader(pdf)
+    for page in reader.pages[:max_pages]:
+        if not has_text_layer(page):
+            continue
+        text = page.extract_text()
+        if text:
+            yield text
+
+
+def extract_text_from_pdf(
+    pdf: Union[str, BinaryIO],
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract text from a PDF file path or binary stream.
+
+    Pages are read one at a time and parsing stops as soon as `max_chars`
+    characters have been collected.
+    """
+    pages = []
+    collected = 0
+    for text in iter_pdf_pages(pdf, max_pages):
+        pages.append(text)
+        collected += len(text)
+        if max_chars and collected >= max_chars:
+            break
+
+    text = "\n".join(pages)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_text_from_pdf_bytes(
+    data: bytes,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract text from PDF bytes held in memory."""
+    return extract_text_from_pdf(io.BytesIO(data), max_pages, max_chars)
+
+
+def read_text_file(file_path: str) -> str:
+    """Read text from a text file."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def decode_text(data: Union[bytes, bytearray, memoryview]) -> str:
+    """Decode an uploaded text resume."""
+    return str(data, encoding='utf-8')
+
+
+def is_pdf(resume_path: str) -> bool:
+    return os.path.splitext(resume_path)[1].lower() in PDF_EXTENSIONS
+
+
+def is_pdf_bytes(data: Union[bytes, bytearray, memoryview]) -> bool:
+    return PDF_MAGIC in bytes(data[:1024])
+
+
+def resume_bytes(resume: ResumeSource) -> Union[bytes, bytearray, memoryview]:
+    """The raw content of a resume; paths and file objects are read once."""
+    if isinstance(resume, str):
+        with open(resume, 'rb') as file:
+            return file.read()
+    if isinstance(resume, (bytes, bytearray, memoryview)):
+        return resume
+    return resume.read()
+
+
+def extract_resume_text(
+    resume: ResumeSource,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract the text of a resume.
+
+    Paths are dispatched on their file extension, in-memory content on the PDF
+    header; anything that is not a PDF is decoded as UTF-8 text.
+    """
+    if isinstance(resume, str):
+        if is_pdf(resume):
+            return extract_text_from_pdf(resume, max_pages, max_chars)
+        return read_text_file(resume)
+
+    data = resume_bytes(resume)
+    if is_pdf_bytes(data):
+        return extract_text_from_pdf_bytes(data, max_pages, max_chars)
+    return decode_text(data)
+
+
+# --- Worker processes ---
+#
+# PDFs are parsed in PDF_WORKERS worker processes. Each is owned by one thread
+# of a small thread pool, which hands it one file at a time and waits for the
+# text. A parse that runs past its timeout only costs its own process: it is
+# terminated and replaced before that thread's next file, while the other
+# workers and the files they are parsing carry on.
+
+
+class _WorkerTimeout(Exception):
+    pass
+
+
+class _WorkerCrashed(Exception):
+    pass
+
+
+def _serve(conn) -> None:
+    """Worker process main loop: runs the (function, args) jobs received on `conn`."""
+    conn.send(None)  # ready, imports done
+    while True:
+        try:
+            function, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, function(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception:
+            # The exception could not be pickled, pass on its message
+            conn.send((False, RuntimeError(f"{type(reply[1]).__name__}: {reply[1]}")))
+
+
+class PdfWorker:
+    """One worker process and the pipe to it."""
+
+    def __init__(self):
+        # spawn rather than fork: the server process runs threads (uvicorn,
+        # SQLite caches) that must not be duplicated into the workers
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        try:
+            # Wait for the start-up, so it does not count against a file's timeout
+            self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.stop()
+            raise _WorkerCrashed() from e
+
+    def run(self, function, args: tuple, timeout: float):
+        try:
+            self.conn.send((function, args))
+            if not self.conn.poll(timeout):
+                raise _WorkerTimeout()
+            ok, value = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise _WorkerCrashed() from e
+        if not ok:
+            raise value
+        return value
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Every live worker, so shutdown_pool() can stop them
+_workers: Set[PdfWorker] = set()
+_workers_lock = threading.Lock()
+# The worker owned by the current executor thread
+_local = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _workers_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf-worker")
+        return _executor
+
+
+def _stop_worker(worker: PdfWorker) -> None:
+    with _workers_lock:
+        _workers.discard(worker)
+    worker.stop()
+
+
+def _run_in_worker(function, args: tuple, timeout: float):
+    """Runs a job in the current thread's worker process, starting one if needed."""
+    worker = getattr(_local, "worker", None)
+    try:
+        if worker is None or not worker.process.is_alive():
+            worker = _local.worker = PdfWorker()
+            with _workers_lock:
+                _workers.add(worker)
+        return worker.run(function, args, timeout)
+    except (_WorkerTimeout, _WorkerCrashed) as e:
+        # This process is stuck on the file or gone: replace it, and only it
+        _local.worker = None
+        if worker is not None:
+            _stop_worker(worker)
+        if isinstance(e, _WorkerTimeout):
+            raise TimeoutError(f"PDF text extraction timed out after {timeout:g}s") from None
+        raise RuntimeError("PDF text extraction worker crashed") from None
+
+
+def shutdown_pool() -> None:
+    """Stops the PDF worker processes; files still being parsed fail."""
+    global _executor
+    with _workers_lock:
+        executor, _executor = _executor, None
+        workers = list(_workers)
+        _workers.clear()
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    for worker in workers:
+        worker.stop()
+
+
+async def extract_resume_text_async(
+    resume: ResumeSource,
+    timeout: float = PDF_TIMEOUT,
+    max_pages: int = PDF_MAX_PAGES,
+    max_chars: int = PDF_MAX_CHARS,
+) -> str:
+    """Extract the text of a resume without blocking the event loop.
+
+    PDFs are parsed in a worker process, at most `max_pages` pages or
+    `max_chars` characters and for at most `timeout` seconds; text is decoded in place (or read in a thread for
+    the legacy path input).
+    """
+    if isinstance(resume, str):
+        if not is_pdf(resume):
+            return await asyncio.to_thread(read_text_file, resume)
+        worker, argument = extract_text_from_pdf, resume
+    else:
+        data = resume_bytes(resume)
+        if not is_pdf_bytes(data):
+            return decode_text(data)
+        # Crossing the process boundary pickles the content, so hand over bytes
+        worker, argument = extract_text_from_pdf_bytes, bytes(data)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), _run_in_worker, worker, (argument, max_pages, max_chars), timeout
+    )
@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+
+# --- Multi-worker deployment ---
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# Runs WEB_CONCURRENCY uvicorn worker processes (one per CPU by default), so
+# request handling, skill matching and the other CPU work of the pipeline
+# scale across cores. With more than one worker, the resume and job caches,
+# the job queue and the LLM rate budget are shared through SQLite files in
+# SHARED_STATE_DIR (see app/shared_state.py), so a resume or posting analyzed
+# by one worker is a cache hit in every other and the workers together stay
+# within LLM_TOKENS_PER_MINUTE.
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+wsgi_app = "main:app"
+# The app uses flat imports (from resume_scorer import ...)
+pythonpath = APP_DIR
+worker_class = "uvicorn.workers.UvicornWorker"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or multiprocessing.cpu_count()
+# Seconds a worker may be unresponsive before it is restarted; async workers
+# stay responsive during long requests, so this does not cap request time
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Seconds running requests get to finish on shutdown or reload
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Restart a worker after this many requests (0 = never), to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+# Workers are forked from this process and inherit its environment
+os.environ["WEB_CONCURRENCY"] = str(workers)
+if workers > 1:
+    os.environ.setdefault("SHARED_STATE_DIR", os.path.join(os.getcwd(), ".state"))
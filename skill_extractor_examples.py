@@ -1,6 +1,13 @@
 import asyncio
 import json
-from app.resume_scorer import skill_extractor_agent, Runner
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from agents import Runner
+from resume_scorer import skill_extractor_agent
+from text_extraction import extract_resume_text
 
 async def example_tech_skills():
     """Example: Check for technical skills in a resume."""
@@ -10,7 +17,7 @@ async def example_tech_skills():
     tech_skills = "Python, JavaScript, React, Node.js, SQL, MongoDB, AWS, Docker, Git, Agile"
     
     input_data = json.dumps({
-        "resume_path": resume_path,
+        "resume_text": extract_resume_text(resume_path),
         "target_skills": tech_skills
     })
     
@@ -29,7 +36,7 @@ async def example_soft_skills():
     soft_skills = "Leadership, Communication, Teamwork, Problem Solving, Time Management, Customer Service"
     
     input_data = json.dumps({
-        "resume_path": resume_path,
+        "resume_text": extract_resume_text(resume_path),
         "target_skills": soft_skills
     })
     
@@ -48,7 +55,7 @@ async def example_sales_skills():
     sales_skills = "Sales, Marketing, CRM, Lead Generation, Negotiation, Account Management, Cold Calling"
     
     input_data = json.dumps({
-        "resume_path": resume_path,
+        "resume_text": extract_resume_text(resume_path),
         "target_skills": sales_skills
     })
     
@@ -67,7 +74,7 @@ async def example_mixed_skills():
     mixed_skills = "Excel, PowerPoint, Data Analysis, Project Management, Sales, Customer Relationship"
     
     input_data = json.dumps({
-        "resume_path": resume_path,
+        "resume_text": extract_resume_text(resume_path),
         "target_skills": mixed_skills
     })
     
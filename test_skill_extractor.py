@@ -1,7 +1,13 @@
 import asyncio
 import json
 import os
-from app.resume_scorer import skill_extractor_agent, Runner
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from agents import Runner
+from resume_scorer import skill_extractor_agent
+from text_extraction import extract_resume_text
 
 async def test_skill_extractor():
     """Test the skill extractor agent with a sample resume."""
@@ -14,7 +20,7 @@ async def test_skill_extractor():
     
     # Prepare input for the skill extractor
     skill_extraction_input = json.dumps({
-        "resume_path": resume_path,
+        "resume_text": extract_resume_text(resume_path),
         "target_skills": target_skills
     })
     